@@ -3,18 +3,21 @@
 """Outlines the approach to meet project objectives using GPT-4."""
 
 from .base_agent import BaseAgent
+from services.context_schemas import ScopeDependentContext
 from typing import Dict, Any
-from dotenv import load_dotenv
-
-load_dotenv()
+import logging
 
 class ApproachAgent(BaseAgent):
+    logger = logging.getLogger(__name__)
+    semantic_cache = True
+
     def __init__(self, agent_id: str, context_manager: Any):
         super().__init__(agent_id, context_manager)
 
-    async def _core_process(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        client_info = context.get('client_info', {})
-        project_objectives = context.get('engagement_details', {}).get('project_objectives', [])
+    def build_request(self, context: ScopeDependentContext) -> Dict[str, Any]:
+        """Validate the context and build the OpenAI request parameters for this agent."""
+        client_info = context.client_info
+        project_objectives = context.engagement_details.get('project_objectives', [])
 
         if not client_info:
             raise ValueError("Client information is missing in context.")
@@ -22,21 +25,24 @@ class ApproachAgent(BaseAgent):
             raise ValueError("Project objectives are missing in engagement details.")
 
         prompt = (
-            f"Based on the following client information and project objectives, outline a strategic approach for the proposal:\n\n"
-            f"Client Name: {client_info.get('company_name')}\n"
-            f"Industry: {client_info.get('industry')}\n"
-            f"Project Objectives: {', '.join(project_objectives)}\n\n"
+            f"{self._shared_prompt_prefix(context)}"
+            f"Based on the client information and project objectives above, outline a strategic approach for the proposal.\n\n"
             f"Approach:"
         )
 
+        return {
+            'prompt': prompt,
+            'system_message': "You are a professional proposal writer.",
+            'model': "gpt-4o",
+            'max_tokens': 500,
+            'temperature': 0.7
+        }
+
+    async def _core_process(self, context: ScopeDependentContext) -> Dict[str, Any]:
+        request = self.build_request(context)
+
         try:
-            response = await self._call_openai(
-                prompt=prompt,
-                system_message="You are a professional proposal writer.",
-                model="gpt-4o",
-                max_tokens=500,
-                temperature=0.7
-            )
+            response = await self._call_openai(**request)
             return {
                 'output': response,
                 'reasoning_log': self.reasoning_log
@@ -3,62 +3,297 @@
 """An abstract base class that defines the structure for all agents, including processing logic, reasoning logs, and validation methods."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any
-from datetime import datetime
+from typing import Dict, Any, List, Optional
+from contextlib import asynccontextmanager
+from dataclasses import fields, is_dataclass
 import logging  # Added import for logging
 from openai import AsyncOpenAI
+from services.llm_cache import llm_cache
+import aiohttp
+import asyncio
+import hashlib
+import json
 import os
+import re
+import time
+import weakref
+
+OPENAI_CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
+
+# One pooled HTTP session per event loop, shared by every agent
+_http_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    session = _http_sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100, limit_per_host=100))
+        _http_sessions[loop] = session
+    return session
+
+# Caps in-flight chat completion requests across all agents and proposals, one semaphore per event loop
+# like the HTTP session, since an asyncio primitive is bound to the loop that first uses it
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+_rate_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def get_rate_limit() -> asyncio.Semaphore:
+    """Return the request concurrency semaphore for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    semaphore = _rate_limits.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+        _rate_limits[loop] = semaphore
+    return semaphore
+# Monotonic time before which no new request is sent, set when OpenAI reports an exhausted rate-limit window
+_rate_limit_resume_at = 0.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def _parse_reset_duration(value: str) -> float:
+    """Parse an `x-ratelimit-reset-*` header such as '1s', '6m0s', or '120ms' into seconds."""
+    return sum(float(amount) * _DURATION_SECONDS[unit] for amount, unit in _DURATION_PART.findall(value))
+
+def _update_rate_limit(headers: Any):
+    """Pause new requests until the reset time when the request or token budget is exhausted."""
+    global _rate_limit_resume_at
+    for kind in ("requests", "tokens"):
+        remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+        reset = headers.get(f"x-ratelimit-reset-{kind}")
+        if remaining is not None and reset and int(remaining) <= 0:
+            _rate_limit_resume_at = max(_rate_limit_resume_at, time.monotonic() + _parse_reset_duration(reset))
+
+@asynccontextmanager
+async def post_chat_completion(payload: Dict[str, Any]):
+    """POST a chat completions request through the shared session, respecting the concurrency and rate limits."""
+    headers = {"Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}"}
+    async with get_rate_limit():
+        delay = _rate_limit_resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # Post directly to the REST endpoint; the SDK's httpx client degrades under concurrent load
+        async with get_http_session().post(OPENAI_CHAT_COMPLETIONS_URL, json=payload, headers=headers) as r:
+            _update_rate_limit(r.headers)
+            yield r
+
+# Shared OpenAI SDK client, created lazily so every agent reuses one connection pool
+_CLIENT: Optional[AsyncOpenAI] = None
+
+def get_client() -> AsyncOpenAI:
+    """Return the process-wide AsyncOpenAI client, creating it on first use."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _CLIENT
+
+class OpenAIHTTPError(RuntimeError):
+    """Raised when the chat completions endpoint answers with a non-200 status."""
+
+    def __init__(self, status: int, detail: Any):
+        super().__init__(f"OpenAI returned HTTP {status}: {detail}")
+        self.status = status
+
+def is_transient_error(error: Exception) -> bool:
+    """Return True for failures worth retrying: rate limits, server errors, and network faults."""
+    if isinstance(error, OpenAIHTTPError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+def context_digest(context: Any) -> str:
+    """Return a short digest of a context that is stable across processes, unlike the builtin `hash`.
+
+    Step contexts are serialized field by field, so equal contexts digest equally whatever their key order.
+    """
+    if is_dataclass(context):
+        context = {f.name: getattr(context, f.name) for f in fields(context)}
+    serialized = json.dumps(context, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(serialized, digest_size=8).hexdigest()
+
+async def close_http_session():
+    """Close the shared aiohttp session for the running event loop, if one was opened."""
+    session = _http_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
 
 class BaseAgent(ABC):
+    logger = logging.getLogger(__name__)
+
+    # Reuse responses to paraphrased prompts for the same client when the cache's semantic layer is
+    # enabled (LLM_SEMANTIC_CACHE); a threshold of None uses the cache-wide default
+    semantic_cache: bool = False
+    semantic_cache_threshold: Optional[float] = None
+
     def __init__(self, agent_id: str, context_manager: Any):
-        print(f"Initializing BaseAgent for {agent_id}")  # Add this debug line
         self.agent_id = agent_id
         self.context_manager = context_manager
         self.reasoning_log = []
-        self.logger = logging.getLogger(self.__class__.__name__)  # Initialized logger
-        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.llm_cache = llm_cache
+        # Responses fetched ahead of time (e.g. through the Batch API), keyed by request cache key
+        self.prefetched_responses: Dict[str, str] = {}
+        # Digest of the client being processed; semantic cache entries are never shared across clients
+        self.semantic_scope: Optional[str] = None
+
+    def reset(self):
+        """Clear all per-proposal state so the agent can be reused for the next proposal.
+
+        The shared LLM cache is not per-proposal state: its entries are keyed by the full request.
+        """
+        # Rebind rather than clear: earlier outputs still hold a reference to the previous log
+        self.reasoning_log = []
+        self.prefetched_responses.clear()
+        self.semantic_scope = None
 
     async def _call_openai(self, 
                         prompt: str, 
                         system_message: str = "You are a professional proposal writer.",
                         model: str = "gpt-4",
                         max_tokens: int = 500,
-                        temperature: float = 0.7) -> str:
-        """Helper method for OpenAI API calls."""
+                        temperature: float = 0.7,
+                        response_format: Optional[Dict[str, Any]] = None) -> str:
+        """Helper method for OpenAI API calls, served from prefetched responses or the LLM cache when possible."""
+        cache_key = self.llm_cache.make_key(model, system_message, prompt, temperature, max_tokens, response_format)
+        if cache_key in self.prefetched_responses:
+            self.log_reasoning('LLM Batch', f'Using prefetched response for {model} request')
+            return self.prefetched_responses.pop(cache_key)
+
+        cacheable = self.llm_cache.is_cacheable(temperature)
+        if cacheable:
+            cached = await self.llm_cache.get(cache_key)
+            if cached is not None:
+                self.log_reasoning('LLM Cache', f'Cache hit for {model} request')
+                return cached
+
+        embedding = None
+        namespace = f"{self.agent_id}:{self.semantic_scope}"
+        if self.semantic_cache and self.llm_cache.semantic_enabled and self.semantic_scope is not None:
+            embedding = await self._embed(prompt)
+            if embedding is not None:
+                cached = self.llm_cache.semantic_get(namespace, embedding, self.semantic_cache_threshold)
+                if cached is not None:
+                    self.log_reasoning('LLM Cache', f'Semantic cache hit for {model} request')
+                    if cacheable:
+                        # Backfill the exact-match layer so the next identical prompt skips the embedding call
+                        await self.llm_cache.set(cache_key, cached)
+                    return cached
+
+        payload = self._build_payload(prompt, system_message, model, max_tokens, temperature, response_format)
+
         try:
-            response = await self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=temperature,
-            )
-            # The response object should be awaited and message.content accessed
-            return response.choices[0].message.content.strip()
+            async with post_chat_completion(payload) as r:
+                # Gateways answer 5xx with HTML or an empty body, so only a 200 is parsed as JSON
+                if r.status != 200:
+                    raise OpenAIHTTPError(r.status, await r.text())
+                response = await r.json(content_type=None)
+            content = response["choices"][0]["message"]["content"].strip()
         except Exception as e:
             self.logger.error(f"OpenAI API error in base agent: {str(e)}")
-            # Print more debug info
-            self.logger.error(f"Response type: {type(response)}")
-            self.logger.error(f"Response dir: {dir(response)}")
             raise
 
+        if cacheable:
+            await self.llm_cache.set(cache_key, content)
+        if embedding is not None:
+            self.llm_cache.semantic_set(namespace, embedding, content)
+        return content
+
+    @staticmethod
+    def _build_payload(prompt: str,
+                       system_message: str,
+                       model: str,
+                       max_tokens: int,
+                       temperature: float,
+                       response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build the chat completions request body."""
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        if response_format is not None:
+            payload["response_format"] = response_format
+        return payload
+
+    @staticmethod
+    def _shared_prompt_prefix(context: Any) -> str:
+        """Return the client and engagement details block that starts every agent prompt.
+
+        Built from the step context being validated, whose master sections are shared by every agent,
+        so all agents send a byte-identical prefix that OpenAI's prefix-based prompt cache can serve.
+        """
+        client_info = context.client_info
+        engagement_details = context.engagement_details
+        return (
+            f"Client Name: {client_info.get('company_name')}\n"
+            f"Industry: {client_info.get('industry')}\n"
+            f"Company Size: {client_info.get('size')}\n"
+            f"Project Objectives: {', '.join(engagement_details.get('project_objectives', []))}\n"
+            f"Timeline: {engagement_details.get('timeline', '')}\n"
+            f"Budget Range: {engagement_details.get('budget_range', '')}\n\n"
+        )
+
+    def build_request(self, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build the `_call_openai` parameters for this agent, or None if it makes no LLM call."""
+        return None
+
+    def prepare_batch_request(self,
+                              prompt: str,
+                              system_message: str = "You are a professional proposal writer.",
+                              model: str = "gpt-4",
+                              max_tokens: int = 500,
+                              temperature: float = 0.7,
+                              response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Return an OpenAI Batch API request line equivalent to the matching `_call_openai` call."""
+        body = self._build_payload(prompt, system_message, model, max_tokens, temperature, response_format)
+        return {"custom_id": self.agent_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+    def add_prefetched_response(self, request: Dict[str, Any], content: str):
+        """Register a response for a request built by `build_request` so `_call_openai` skips the API."""
+        cache_key = self.llm_cache.make_key(
+            request['model'],
+            request['system_message'],
+            request['prompt'],
+            request['temperature'],
+            request['max_tokens'],
+            request.get('response_format')
+        )
+        self.prefetched_responses[cache_key] = content
+
+    async def _embed(self, text: str, model: str = "text-embedding-3-small") -> Optional[List[float]]:
+        """Return a normalized embedding for the text, or None if the embedding call fails."""
+        embedding = self.llm_cache.get_embedding(text)
+        if embedding is not None:
+            return embedding
+        try:
+            response = await get_client().embeddings.create(model=model, input=text)
+        except Exception as e:
+            self.logger.warning(f"Embedding request failed, skipping semantic cache: {e}")
+            return None
+        return self.llm_cache.set_embedding(text, response.data[0].embedding)
+
     async def process(self, input_context: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            self._validate_input_context(input_context)
-            start_time = datetime.now()
-            self.log_reasoning('Processing Start', f'Begin processing at {start_time}')
+            start_ns = time.monotonic_ns()
+            # Digested once per run; the semantic scope is only needed when the semantic layer can be used
+            input_hash = context_digest(input_context)
+            if self.semantic_cache and self.llm_cache.semantic_enabled:
+                self.semantic_scope = context_digest(getattr(input_context, 'client_info', None) or {})
+            self.log_reasoning('Processing Start', 'Begin processing')
             result = await self._core_process(input_context)
-            self._validate_output(result)
-            processing_time = datetime.now() - start_time
-            self.log_reasoning('Processing Complete', f'Completed in {processing_time}')
+            # Agents validate the fields they need in _core_process; this generic check is stripped under `python -O`
+            if __debug__:
+                self._validate_output(result)
+            processing_time_ns = time.monotonic_ns() - start_ns
+            self.log_reasoning('Processing Complete', f'Completed in {processing_time_ns / 1e6:.1f} ms')
             return {
                 'output': result,
                 'reasoning_log': self.reasoning_log,
                 'metadata': {
-                    'processing_time': str(processing_time),
-                    'input_hash': hash(str(input_context)),
+                    'processing_time_ns': processing_time_ns,
+                    'input_hash': input_hash,
                     'version': self.context_manager.get_context_version(self.agent_id)
                 }
             }
@@ -73,18 +308,13 @@ class BaseAgent(ABC):
         pass
 
     def log_reasoning(self, step: str, rationale: str):
-        """Log reasoning steps for transparency"""
+        """Log reasoning steps for transparency; timestamps are monotonic nanoseconds"""
         self.reasoning_log.append({
             'step': step,
             'rationale': rationale,
-            'timestamp': datetime.now()
+            'timestamp': time.monotonic_ns()
         })
 
-    def _validate_input_context(self, input_context: Dict[str, Any]):
-        """Validate input context before processing"""
-        if not input_context:
-            raise ValueError("Input context is empty.")
-
     def _validate_output(self, result: Any):
         """Validate output after processing"""
         if not result:
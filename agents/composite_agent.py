@@ -0,0 +1,82 @@
+# agents/composite_agent.py
+
+"""Generates the approach, executive summary, team, timeline, and pricing sections in a single structured GPT-4o call."""
+
+from .base_agent import BaseAgent
+from services.context_schemas import ScopeDependentContext
+from .schemas import ProposalSections, json_schema_format
+from typing import Dict, Any
+import json
+import logging
+
+# Sections produced by the composite call, keyed by the agent each one stands in for
+COMPOSITE_SECTIONS = {
+    "approach_agent": "approach",
+    "executive_summary_agent": "executive_summary",
+    "team_agent": "team",
+    "timeline_agent": "timeline",
+    "pricing_agent": "pricing",
+}
+
+COMPOSITE_FORMAT = json_schema_format("proposal_sections", ProposalSections)
+
+class CompositeAgent(BaseAgent):
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, agent_id: str, context_manager: Any):
+        super().__init__(agent_id, context_manager)
+
+    def build_request(self, context: ScopeDependentContext) -> Dict[str, Any]:
+        """Validate the context and build the OpenAI request parameters for this agent."""
+        client_info = context.client_info
+        engagement_details = context.engagement_details
+        project_objectives = engagement_details.get('project_objectives', [])
+
+        if not client_info:
+            raise ValueError("Client information is missing in context.")
+        if not project_objectives:
+            raise ValueError("Project objectives are missing in engagement details.")
+
+        prompt = (
+            f"{self._shared_prompt_prefix(context)}"
+            f"Based on the client information and project details above, write the sections of a proposal:\n\n"
+            f"Sections:\n"
+            f"- approach: a strategic approach for the proposal\n"
+            f"- executive_summary: an executive summary of the proposal\n"
+            f"- team: the proposed team structure and expertise, one entry per team member\n"
+            f"- timeline: a detailed project timeline, one entry per milestone\n"
+            f"- pricing: a pricing model and budget breakdown, one entry per service"
+        )
+
+        return {
+            'prompt': prompt,
+            'system_message': "You are a professional proposal writer.",
+            'model': "gpt-4o",
+            'max_tokens': 2500,
+            'temperature': 0.7,
+            'response_format': COMPOSITE_FORMAT
+        }
+
+    async def _core_process(self, context: ScopeDependentContext) -> Dict[str, Any]:
+        request = self.build_request(context)
+
+        try:
+            response = await self._call_openai(**request)
+            sections = json.loads(response)
+        except Exception as e:
+            self.logger.error(f"Failed to generate composite sections: {e}")
+            raise
+
+        # Publish each section to its agent's step context as if that agent had run
+        outputs = {}
+        for agent_id, section in COMPOSITE_SECTIONS.items():
+            outputs[agent_id] = {
+                'output': sections[section],
+                'reasoning_log': self.reasoning_log
+            }
+            self.context_manager.update_step_context(agent_id, {"output": outputs[agent_id]})
+
+        return {
+            'output': outputs,
+            'reasoning_log': self.reasoning_log
+        }
@@ -3,18 +3,20 @@
 """Generates an executive summary using GPT-4."""
 
 from .base_agent import BaseAgent
+from services.context_schemas import ExecutiveSummaryContext
 from typing import Dict, Any
-from dotenv import load_dotenv
-
-load_dotenv()
+import logging
 
 class ExecutiveSummaryAgent(BaseAgent):
+    logger = logging.getLogger(__name__)
+
     def __init__(self, agent_id: str, context_manager: Any):
         super().__init__(agent_id, context_manager)
 
-    async def _core_process(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        client_info = context.get('client_info', {})
-        engagement_details = context.get('engagement_details', {})
+    def build_request(self, context: ExecutiveSummaryContext) -> Dict[str, Any]:
+        """Validate the context and build the OpenAI request parameters for this agent."""
+        client_info = context.client_info
+        engagement_details = context.engagement_details
         project_objectives = engagement_details.get('project_objectives', [])
 
         if not client_info:
@@ -23,22 +25,24 @@ class ExecutiveSummaryAgent(BaseAgent):
             raise ValueError("Project objectives are missing in engagement details.")
 
         prompt = (
-            f"Create an executive summary for a proposal based on the following details:\n\n"
-            f"Client Name: {client_info.get('company_name')}\n"
-            f"Industry: {client_info.get('industry')}\n"
-            f"Company Size: {client_info.get('size')}\n"
-            f"Key Objectives: {', '.join(project_objectives)}\n\n"
+            f"{self._shared_prompt_prefix(context)}"
+            f"Create an executive summary for a proposal based on the details above.\n\n"
             f"Executive Summary:"
         )
 
+        return {
+            'prompt': prompt,
+            'system_message': "You are a professional proposal writer.",
+            'model': "gpt-4o",
+            'max_tokens': 500,
+            'temperature': 0.7
+        }
+
+    async def _core_process(self, context: ExecutiveSummaryContext) -> Dict[str, Any]:
+        request = self.build_request(context)
+
         try:
-            response = await self._call_openai(
-                prompt=prompt,
-                system_message="You are a professional proposal writer.",
-                model="gpt-4o",
-                max_tokens=500,
-                temperature=0.7
-            )
+            response = await self._call_openai(**request)
             return {
                 'output': response,
                 'reasoning_log': self.reasoning_log
@@ -3,17 +3,26 @@
 """Provides pricing models and budget breakdown using GPT-4."""
 
 from .base_agent import BaseAgent
+from services.context_schemas import ScopeDependentContext
+from .schemas import PricingList, json_schema_format
 from typing import Dict, Any
-from dotenv import load_dotenv
+import json
+import logging
 
-load_dotenv()
+PRICING_FORMAT = json_schema_format("pricing", PricingList)
 
 class PricingAgent(BaseAgent):
+    logger = logging.getLogger(__name__)
+    semantic_cache = True
+    # Pricing is correctness-sensitive, so only near-identical prompts may share a response
+    semantic_cache_threshold = 0.95
+
     def __init__(self, agent_id: str, context_manager: Any):
         super().__init__(agent_id, context_manager)
 
-    async def _core_process(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        engagement_details = context.get('engagement_details', {})
+    def build_request(self, context: ScopeDependentContext) -> Dict[str, Any]:
+        """Validate the context and build the OpenAI request parameters for this agent."""
+        engagement_details = context.engagement_details
         budget_range = engagement_details.get('budget_range', "")
         project_objectives = engagement_details.get('project_objectives', [])
 
@@ -23,29 +32,26 @@ class PricingAgent(BaseAgent):
             raise ValueError("Project objectives are missing in engagement details.")
 
         prompt = (
-            f"Based on the following project objectives and budget range, provide a detailed pricing model and budget breakdown:\n\n"
-            f"Budget Range: {budget_range}\n"
-            f"Project Objectives: {', '.join(project_objectives)}\n\n"
+            f"{self._shared_prompt_prefix(context)}"
+            f"Based on the project objectives and budget range above, provide a detailed pricing model and budget breakdown.\n\n"
             f"Pricing Model and Budget Breakdown:"
         )
 
+        return {
+            'prompt': prompt,
+            'system_message': "You are a professional proposal writer specializing in pricing.",
+            'model': "gpt-4o",
+            'max_tokens': 500,
+            'temperature': 0.7,
+            'response_format': PRICING_FORMAT
+        }
+
+    async def _core_process(self, context: ScopeDependentContext) -> Dict[str, Any]:
+        request = self.build_request(context)
+
         try:
-            response = await self._call_openai(
-                prompt=prompt,
-                system_message="You are a professional proposal writer specializing in pricing.",
-                model="gpt-4",
-                max_tokens=500,
-                temperature=0.7
-            )
-            
-            pricing_items = response.strip().split('\n')
-            pricing = []
-            for item in pricing_items:
-                service_cost = item.strip('- ').strip()
-                if ':' in service_cost:
-                    service, cost = service_cost.split(':', 1)
-                    pricing.append({'service': service.strip(), 'cost': cost.strip()})
-            
+            response = await self._call_openai(**request)
+            pricing = json.loads(response)['items']
             return {
                 'output': pricing,
                 'reasoning_log': self.reasoning_log
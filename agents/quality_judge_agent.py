@@ -3,18 +3,28 @@
 """Validates proposal sections by acting as an LLM-based judge."""
 
 from .base_agent import BaseAgent
+from services.context_schemas import QualityJudgeContext
 from typing import Dict, Any
-from dotenv import load_dotenv
+import json
+import logging
 
-load_dotenv()
+VERDICT_SCHEMA = {
+    "type": "object",
+    "properties": {"pass": {"type": "boolean"}},
+    "required": ["pass"],
+    "additionalProperties": False
+}
 
 class QualityJudgeAgent(BaseAgent):
+    logger = logging.getLogger(__name__)
+
     def __init__(self, agent_id: str, context_manager: Any):
         super().__init__(agent_id, context_manager)
 
-    async def _core_process(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        section_content = context.get('section_content', "")
-        section_id = context.get('section_id', "")
+    def build_request(self, context: QualityJudgeContext) -> Dict[str, Any]:
+        """Validate the context and build the OpenAI request parameters for this agent."""
+        section_content = context.section_content
+        section_id = context.section_id
 
         if not section_content or not section_id:
             raise ValueError("Section content or section ID is missing in context.")
@@ -23,23 +33,34 @@ class QualityJudgeAgent(BaseAgent):
             f"You are an expert in proposal writing. Validate the following section for completeness, coherence, style compliance, and content quality:\n\n"
             f"Section ID: {section_id}\n"
             f"Content:\n{section_content}\n\n"
-            f"Please respond with 'pass' if the section meets all quality standards, or provide detailed feedback on what needs to be improved."
+            f"Respond with pass set to true if the section meets all quality standards, or false otherwise."
         )
 
+        # A binary verdict needs neither a large model nor a long completion
+        return {
+            'prompt': prompt,
+            'system_message': "You are an expert in proposal quality assurance.",
+            'model': "gpt-4o-mini",
+            'max_tokens': 10,
+            'temperature': 0.3,
+            'response_format': {
+                "type": "json_schema",
+                "json_schema": {"name": "verdict", "schema": VERDICT_SCHEMA, "strict": True}
+            }
+        }
+
+    async def _core_process(self, context: QualityJudgeContext) -> Dict[str, Any]:
+        request = self.build_request(context)
+        section_id = context.section_id
+
         try:
-            response = await self._call_openai(
-                prompt=prompt,
-                system_message="You are an expert in proposal quality assurance.",
-                model="gpt-4o",
-                max_tokens=1000,
-                temperature=0.3
-            )
-            response_text = response.lower()
-            if response_text == 'pass':
+            response = await self._call_openai(**request)
+            # The schema-constrained verdict is a boolean field; no case folding of the response is needed
+            if json.loads(response)['pass']:
                 return {'output': True, 'reasoning_log': self.reasoning_log}
             else:
-                self.logger.warning(f"Quality feedback for section '{section_id}': {response_text}")
+                self.logger.warning(f"Section '{section_id}' did not meet quality standards: {response}")
                 return {'output': False, 'reasoning_log': self.reasoning_log}
         except Exception as e:
             self.logger.error(f"Unexpected error: {e}")
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,46 @@
+# agents/schemas.py
+
+"""Pydantic schemas for structured agent outputs, used to build JSON-schema response formats for OpenAI."""
+
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, Any, List
+
+class StrictModel(BaseModel):
+    # Strict structured outputs require every object to forbid additional properties
+    model_config = ConfigDict(extra='forbid')
+
+class PricingItem(StrictModel):
+    service: str
+    cost: str
+
+class PricingList(StrictModel):
+    items: List[PricingItem]
+
+class TeamMember(StrictModel):
+    name: str
+    role: str
+    description: str
+
+class TeamList(StrictModel):
+    items: List[TeamMember]
+
+class Milestone(StrictModel):
+    name: str
+    date: str
+
+class MilestoneList(StrictModel):
+    items: List[Milestone]
+
+class ProposalSections(StrictModel):
+    approach: str
+    executive_summary: str
+    team: List[TeamMember]
+    timeline: List[Milestone]
+    pricing: List[PricingItem]
+
+def json_schema_format(name: str, model: type) -> Dict[str, Any]:
+    """Build a strict `response_format` for the given schema model."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": model.model_json_schema(), "strict": True}
+    }
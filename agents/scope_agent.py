@@ -3,13 +3,17 @@
 """Defines the project scope based on client information."""
 
 from .base_agent import BaseAgent
+from services.context_schemas import ScopeContext
 from typing import Dict, Any
+import logging
 
 class ScopeAgent(BaseAgent):
-    async def _core_process(self, context: Dict[str, Any]) -> str:
-        client_info = context.get('client_info', {})
-        engagement_details = context.get('engagement_details', {})
-        specific_requirements = context.get('specific_requirements', {})
+    logger = logging.getLogger(__name__)
+
+    async def _core_process(self, context: ScopeContext) -> str:
+        client_info = context.client_info
+        engagement_details = context.engagement_details
+        specific_requirements = context.specific_requirements
         custom_requirements = engagement_details.get('custom_requirements', [])
 
         # Check if necessary data is present
@@ -18,7 +22,7 @@ class ScopeAgent(BaseAgent):
         if not engagement_details:
             raise ValueError("Engagement details are missing in context.")
 
-        scope = (
+        parts = [
             f"Project Scope for {client_info.get('company_name')}:\n"
             f"- Industry: {client_info.get('industry')}\n"
             f"- Size: {client_info.get('size')}\n"
@@ -27,15 +31,12 @@ class ScopeAgent(BaseAgent):
             f"- Timeline: {engagement_details.get('timeline')}\n"
             f"- Budget Range: {engagement_details.get('budget_range')}\n\n"
             f"Custom Requirements:\n"
-        )
-
-        for req in custom_requirements:
-            scope += f"- {req}\n"
+        ]
+        parts.extend(f"- {req}\n" for req in custom_requirements)
 
-        scope += "\nThis project will focus on addressing the key challenges identified by the client, including:\n"
+        parts.append("\nThis project will focus on addressing the key challenges identified by the client, including:\n")
 
         key_challenges = specific_requirements.get('key_challenges', [])
-        for challenge in key_challenges:
-            scope += f"- {challenge}\n"
+        parts.extend(f"- {challenge}\n" for challenge in key_challenges)
 
-        return scope
\ No newline at end of file
+        return "".join(parts)
@@ -3,18 +3,25 @@
 """Describes the proposed team structure and expertise using GPT-4."""
 
 from .base_agent import BaseAgent
+from services.context_schemas import ScopeDependentContext
+from .schemas import TeamList, json_schema_format
 from typing import Dict, Any
-from dotenv import load_dotenv
+import json
+import logging
 
-load_dotenv()
+TEAM_FORMAT = json_schema_format("team", TeamList)
 
 class TeamAgent(BaseAgent):
+    logger = logging.getLogger(__name__)
+    semantic_cache = True
+
     def __init__(self, agent_id: str, context_manager: Any):
         super().__init__(agent_id, context_manager)
 
-    async def _core_process(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        client_info = context.get('client_info', {})
-        project_objectives = context.get('engagement_details', {}).get('project_objectives', [])
+    def build_request(self, context: ScopeDependentContext) -> Dict[str, Any]:
+        """Validate the context and build the OpenAI request parameters for this agent."""
+        client_info = context.client_info
+        project_objectives = context.engagement_details.get('project_objectives', [])
 
         if not client_info:
             raise ValueError("Client information is missing in context.")
@@ -22,31 +29,26 @@ class TeamAgent(BaseAgent):
             raise ValueError("Project objectives are missing in engagement details.")
 
         prompt = (
-            f"Based on the following client information and project objectives, describe the proposed team structure and expertise for the project:\n\n"
-            f"Client Name: {client_info.get('company_name')}\n"
-            f"Project Objectives: {', '.join(project_objectives)}\n\n"
+            f"{self._shared_prompt_prefix(context)}"
+            f"Based on the client information and project objectives above, describe the proposed team structure and expertise for the project.\n\n"
             f"Team Structure:"
         )
 
+        return {
+            'prompt': prompt,
+            'system_message': "You are a professional proposal writer specializing in team composition.",
+            'model': "gpt-4o",
+            'max_tokens': 500,
+            'temperature': 0.7,
+            'response_format': TEAM_FORMAT
+        }
+
+    async def _core_process(self, context: ScopeDependentContext) -> Dict[str, Any]:
+        request = self.build_request(context)
+
         try:
-            response = await self._call_openai(
-                prompt=prompt,
-                system_message="You are a professional proposal writer specializing in team composition.",
-                model="gpt-4o",
-                max_tokens=500,
-                temperature=0.7
-            )
-            
-            team_members = response.split('\n')
-            team = []
-            for member in team_members:
-                name_role, description = member.split(':', 1) if ':' in member else (member, "")
-                team.append({
-                    'name': name_role.strip(),
-                    'role': '',
-                    'description': description.strip()
-                })
-                
+            response = await self._call_openai(**request)
+            team = json.loads(response)['items']
             return {
                 'output': team,
                 'reasoning_log': self.reasoning_log
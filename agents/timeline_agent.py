@@ -3,40 +3,49 @@
 """Develops a detailed project timeline using GPT-4."""
 
 from .base_agent import BaseAgent
+from services.context_schemas import ScopeDependentContext
+from .schemas import MilestoneList, json_schema_format
 from typing import Dict, Any
-from dotenv import load_dotenv
+import json
+import logging
 
-load_dotenv()
+TIMELINE_FORMAT = json_schema_format("timeline", MilestoneList)
 
 class TimelineAgent(BaseAgent):
+    logger = logging.getLogger(__name__)
+
     def __init__(self, agent_id: str, context_manager: Any):
         super().__init__(agent_id, context_manager)
 
-    async def _core_process(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        engagement_details = context.get('engagement_details', {})
-        timeline = engagement_details.get('timeline', "")
+    def build_request(self, context: ScopeDependentContext) -> Dict[str, Any]:
+        """Validate the context and build the OpenAI request parameters for this agent."""
+        engagement_details = context.engagement_details
         project_objectives = engagement_details.get('project_objectives', [])
 
         if not project_objectives:
             raise ValueError("Project objectives are missing in engagement details.")
 
         prompt = (
-            f"Based on the following project objectives and timeline, develop a detailed project timeline:\n\n"
-            f"Timeline: {timeline}\n"
-            f"Project Objectives: {', '.join(project_objectives)}\n\n"
+            f"{self._shared_prompt_prefix(context)}"
+            f"Based on the project objectives and timeline above, develop a detailed project timeline.\n\n"
             f"Project Timeline:"
         )
 
+        return {
+            'prompt': prompt,
+            'system_message': "You are a professional project planner.",
+            'model': "gpt-4o",
+            'max_tokens': 500,
+            'temperature': 0.7,
+            'response_format': TIMELINE_FORMAT
+        }
+
+    async def _core_process(self, context: ScopeDependentContext) -> Dict[str, Any]:
+        request = self.build_request(context)
+
         try:
-            response = await self._call_openai(
-                prompt=prompt,
-                system_message="You are a professional project planner.",
-                model="gpt-4",
-                max_tokens=500,
-                temperature=0.7
-            )
-            
-            milestones = [m.strip('- ').strip() for m in response.split('\n') if m.strip()]
+            response = await self._call_openai(**request)
+            milestones = json.loads(response)['items']
             return {
                 'output': milestones,
                 'reasoning_log': self.reasoning_log
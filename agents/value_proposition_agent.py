@@ -3,20 +3,23 @@
 """Crafts the value proposition using GPT-4 based on the client configuration."""
 
 from .base_agent import BaseAgent
+from services.context_schemas import ValuePropositionContext
 from typing import Dict, Any
-from dotenv import load_dotenv
-
-load_dotenv()
+import logging
 
 class ValuePropositionAgent(BaseAgent):
+    logger = logging.getLogger(__name__)
+    semantic_cache = True
+
     def __init__(self, agent_id: str, context_manager: Any):
         super().__init__(agent_id, context_manager)
 
-    async def _core_process(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        client_info = context.get('client_info', {})
-        engagement_details = context.get('engagement_details', {})
+    def build_request(self, context: ValuePropositionContext) -> Dict[str, Any]:
+        """Validate the context and build the OpenAI request parameters for this agent."""
+        client_info = context.client_info
+        engagement_details = context.engagement_details
         project_objectives = engagement_details.get('project_objectives', [])
-        proposal_needs = context.get('proposal_needs', {})
+        proposal_needs = context.proposal_needs
 
         if not client_info:
             raise ValueError("Client information is missing in context.")
@@ -27,25 +30,26 @@ class ValuePropositionAgent(BaseAgent):
         additional_notes = proposal_needs.get('additional_notes', '')
 
         prompt = (
-            f"Based on the following client information and project objectives, generate a compelling value proposition for a proposal.\n\n"
-            f"Client Name: {client_info.get('company_name')}\n"
-            f"Industry: {client_info.get('industry')}\n"
-            f"Company Size: {client_info.get('size')}\n"
-            f"Project Objectives: {', '.join(project_objectives)}\n"
+            f"{self._shared_prompt_prefix(context)}"
             f"Document Style: {document_style}\n"
             f"Additional Notes: {additional_notes}\n\n"
+            f"Based on the client information and project objectives above, generate a compelling value proposition for a proposal.\n\n"
             f"Value Proposition:"
         )
 
+        return {
+            'prompt': prompt,
+            'system_message': "You are a professional proposal writer.",
+            'model': "gpt-4",
+            'max_tokens': 500,
+            'temperature': 0.7
+        }
+
+    async def _core_process(self, context: ValuePropositionContext) -> Dict[str, Any]:
+        request = self.build_request(context)
+
         try:
-            print("About to call _call_openai")  # Add this line
-            response = await self._call_openai(
-                prompt=prompt,
-                system_message="You are a professional proposal writer.",
-                model="gpt-4",
-                max_tokens=500,
-                temperature=0.7
-            )
+            response = await self._call_openai(**request)
             return {
                 'output': response,
                 'reasoning_log': self.reasoning_log
@@ -2,6 +2,11 @@
 
 """The core engine that initializes contexts, registers agents, manages execution flow, and triggers the proposal assembly process."""
 
+from dotenv import load_dotenv
+
+# Load .env once, before any module that reads configuration from the environment
+load_dotenv()
+
 from services.context_manager import ContextManager
 from services.dependency_graph import DependencyGraph
 from services.quality_control import ProposalQualityControl
@@ -14,9 +19,12 @@ from agents.approach_agent import ApproachAgent
 from agents.timeline_agent import TimelineAgent
 from agents.team_agent import TeamAgent
 from agents.pricing_agent import PricingAgent
+from agents.composite_agent import CompositeAgent
+from agents.base_agent import BaseAgent, get_client
 from typing import Dict, Any
 from datetime import datetime
 import asyncio
+import json
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -27,18 +35,34 @@ class ProposalEngine:
         self.context_manager = ContextManager()
         self.dependency_graph = DependencyGraph()
         self.quality_control = ProposalQualityControl(self.context_manager)
-        self.assembler = ProposalAssembler(self.context_manager)
+        self.assembler = ProposalAssembler(self.context_manager, self.quality_control)
         self.trigger_controller = TriggerController(
             context_manager=self.context_manager,
             dependency_graph=self.dependency_graph,
             quality_control=self.quality_control,
             assembler=self.assembler
         )
+        # Built once and reused: reset() clears each agent's per-proposal state (reasoning log, prefetched
+        # responses) before every proposal, while the LLM and output caches are shared on purpose and
+        # keyed by the exact request sent
+        self.agents: Dict[str, BaseAgent] = {
+            "scope_agent": ScopeAgent("scope_agent", self.context_manager),
+            "value_proposition_agent": ValuePropositionAgent("value_proposition_agent", self.context_manager),
+            "executive_summary_agent": ExecutiveSummaryAgent("executive_summary_agent", self.context_manager),
+            "approach_agent": ApproachAgent("approach_agent", self.context_manager),
+            "timeline_agent": TimelineAgent("timeline_agent", self.context_manager),
+            "team_agent": TeamAgent("team_agent", self.context_manager),
+            "pricing_agent": PricingAgent("pricing_agent", self.context_manager),
+            "composite_agent": CompositeAgent("composite_agent", self.context_manager),
+        }
+        self.context_manager.register_agents(self.agents)
         self.logger = logging.getLogger(__name__)
 
     async def generate_proposal(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Generate a full proposal based on given configuration"""
         try:
+            # Step contexts from a previous proposal must not leak into this one
+            self.context_manager.clear_step_contexts()
             self.context_manager.update_master_context({
                 'client_info': {
                     'company_name': config['client_info']['company_name'],
@@ -65,18 +89,26 @@ class ProposalEngine:
                 'additional_notes': config['proposal_needs'].get('additional_notes', "")
             })
 
+            for agent in self.agents.values():
+                agent.reset()
+            self.quality_control.quality_judge_agent.reset()
+
             # Create recovery point
             recovery_point = await self._create_recovery_point()
 
             try:
                 # Register agents with dependencies
-                await self._register_agents()
+                await self._register_agents(composite_mode=config.get('composite_mode', False))
+
+                # Fetch all LLM responses up front through the Batch API for offline runs
+                if config.get('batch_mode'):
+                    await self._prefetch_batch_responses()
 
                 # Execute all agents
                 await self.trigger_controller.run_all()
 
                 # Assemble proposal
-                proposal = await self.assembler.assemble_proposal()
+                proposal = await self.assembler.assemble_pdfs()
 
                 # Validate final output
                 if not await self._validate_final_proposal(proposal):
@@ -89,87 +121,157 @@ class ProposalEngine:
                 await self._recover_from_error(recovery_point, e)
                 raise
 
+            finally:
+                self.context_manager.release_checkpoints()
+
         except Exception as e:
             self.logger.error(f"Proposal generation failed: {e}")
             raise
 
-    async def _register_agents(self):
-        """Register agents for each proposal section"""
-        # Instantiate agents
-        scope_agent = ScopeAgent("scope_agent", self.context_manager)
-        value_prop_agent = ValuePropositionAgent("value_proposition_agent", self.context_manager)
-        exec_summary_agent = ExecutiveSummaryAgent("executive_summary_agent", self.context_manager)
-        approach_agent = ApproachAgent("approach_agent", self.context_manager)
-        timeline_agent = TimelineAgent("timeline_agent", self.context_manager)
-        team_agent = TeamAgent("team_agent", self.context_manager)
-        pricing_agent = PricingAgent("pricing_agent", self.context_manager)
+    async def _register_agents(self, composite_mode: bool = False):
+        """Register agents for each proposal section.
+
+        In composite mode a single CompositeAgent generates the approach, executive summary,
+        timeline, team, and pricing sections in one structured call.
+        """
+        # Start from an empty registry so agents from a previous run in the other mode do not run again
+        self.trigger_controller.clear_agents()
 
         # Register ScopeAgent (no dependencies)
         self.trigger_controller.register_agent(
             agent_id="scope_agent",
             dependencies=[],
-            callback=scope_agent.process
+            callback=self.agents["scope_agent"].process,
+            request_builder=self.agents["scope_agent"].build_request
         )
 
-        # Register ValuePropositionAgent (depends on ScopeAgent)
+        # Register ValuePropositionAgent (no dependencies)
         self.trigger_controller.register_agent(
             agent_id="value_proposition_agent",
-            dependencies=["scope_agent"],
-            callback=value_prop_agent.process
+            dependencies=[],
+            callback=self.agents["value_proposition_agent"].process,
+            request_builder=self.agents["value_proposition_agent"].build_request
         )
 
+        if composite_mode:
+            # Register CompositeAgent (depends on ScopeAgent)
+            self.trigger_controller.register_agent(
+                agent_id="composite_agent",
+                dependencies=["scope_agent"],
+                # No request builder: its outputs are published to the other agents' step contexts,
+                # which a memoized hit would skip
+                callback=self.agents["composite_agent"].process
+            )
+            return
+
         # Register ExecutiveSummaryAgent (depends on ValuePropositionAgent)
         self.trigger_controller.register_agent(
             agent_id="executive_summary_agent",
             dependencies=["value_proposition_agent"],
-            callback=exec_summary_agent.process
+            callback=self.agents["executive_summary_agent"].process,
+            request_builder=self.agents["executive_summary_agent"].build_request
         )
 
-        # Register ApproachAgent (depends on ExecutiveSummaryAgent)
+        # Register ApproachAgent (depends on ScopeAgent)
         self.trigger_controller.register_agent(
             agent_id="approach_agent",
-            dependencies=["executive_summary_agent"],
-            callback=approach_agent.process
+            dependencies=["scope_agent"],
+            callback=self.agents["approach_agent"].process,
+            request_builder=self.agents["approach_agent"].build_request
         )
 
-        # Register TimelineAgent (depends on ApproachAgent)
+        # Register TimelineAgent (depends on ScopeAgent)
         self.trigger_controller.register_agent(
             agent_id="timeline_agent",
-            dependencies=["approach_agent"],
-            callback=timeline_agent.process
+            dependencies=["scope_agent"],
+            callback=self.agents["timeline_agent"].process,
+            request_builder=self.agents["timeline_agent"].build_request
         )
 
-        # Register TeamAgent (depends on TimelineAgent)
+        # Register TeamAgent (depends on ScopeAgent)
         self.trigger_controller.register_agent(
             agent_id="team_agent",
-            dependencies=["timeline_agent"],
-            callback=team_agent.process
+            dependencies=["scope_agent"],
+            callback=self.agents["team_agent"].process,
+            request_builder=self.agents["team_agent"].build_request
         )
 
-        # Register PricingAgent (depends on TeamAgent)
+        # Register PricingAgent (depends on ScopeAgent)
         self.trigger_controller.register_agent(
             agent_id="pricing_agent",
-            dependencies=["team_agent"],
-            callback=pricing_agent.process
+            dependencies=["scope_agent"],
+            callback=self.agents["pricing_agent"].process,
+            request_builder=self.agents["pricing_agent"].build_request
         )
 
+    async def _prefetch_batch_responses(self, poll_interval: float = 30.0):
+        """Submit every agent's LLM request as one OpenAI batch and hand the results back to the agents.
+
+        Prompts are built from the master context, so the agents' later `_call_openai` calls
+        are served from the prefetched responses instead of the API.
+        """
+        requests = {}
+        for agent_id in self.trigger_controller.agent_callbacks:
+            request = self.agents[agent_id].build_request(self.context_manager.build_step_context(agent_id))
+            if request is not None:
+                requests[agent_id] = request
+
+        if not requests:
+            return
+
+        lines = "\n".join(
+            json.dumps(self.agents[agent_id].prepare_batch_request(**request))
+            for agent_id, request in requests.items()
+        )
+
+        client = get_client()
+        batch_file = await client.files.create(file=("proposal_batch.jsonl", lines.encode()), purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        self.logger.info(f"Submitted batch {batch.id} with {len(requests)} requests")
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            batch = await client.batches.retrieve(batch.id)
+
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch.id} finished with status {batch.status}")
+
+        output = await client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            item = json.loads(line)
+            agent_id = item['custom_id']
+            response = item.get('response') or {}
+            if response.get('status_code') != 200:
+                # Leave the agent to call the API directly
+                self.logger.warning(f"Batch request for {agent_id} failed: {item.get('error')}")
+                continue
+            content = response['body']['choices'][0]['message']['content'].strip()
+            self.agents[agent_id].add_prefetched_response(requests[agent_id], content)
+
     async def _create_recovery_point(self) -> Dict[str, Any]:
         """Create a recovery point to revert to in case of error"""
-        return {
-            'master_context': self.context_manager.master_context.copy(),
-            'step_contexts': {k: v.copy() for k, v in self.context_manager.step_contexts.items()}
-        }
+        # Only a version is stored; the context manager journals changes made after it
+        return {'version': self.context_manager.checkpoint()}
 
     async def _recover_from_error(self, recovery_point: Dict[str, Any], error: Exception):
         """Attempt to recover from an error using the saved recovery point"""
         self.logger.warning(f"Attempting recovery due to error: {error}")
-        self.context_manager.master_context = recovery_point['master_context']
-        self.context_manager.step_contexts = recovery_point['step_contexts']
-        # Reset agent statuses
-        for agent_id in self.trigger_controller.agent_status:
-            self.trigger_controller.agent_status[agent_id].state = "pending"
-            self.trigger_controller.agent_status[agent_id].output = None
-            self.trigger_controller.agent_status[agent_id].error = None
+        agent_status = self.trigger_controller.agent_status
+        failed = [agent_id for agent_id, status in agent_status.items() if status.state == "failed"]
+        if failed:
+            # Transient errors were already retried; keep completed work and reset only the failed agents
+            for agent_id in failed:
+                self.context_manager.reset_step_context(agent_id)
+        else:
+            self.context_manager.rollback_to(recovery_point['version'])
+            failed = list(agent_status)
+
+        for agent_id in failed:
+            self.trigger_controller.reset_agent(agent_id)
         # Optionally, re-execute agents or notify the user for manual intervention
 
     async def _validate_final_proposal(self, proposal: Dict[str, Any]) -> bool:
@@ -1,6 +1,12 @@
 # main.py
+from dotenv import load_dotenv
+
+# Load .env once, before any module that reads configuration from the environment
+load_dotenv()
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, FileResponse, Response
 from services.context_manager import ContextManager
 from services.trigger_controller import TriggerController
 from services.dependency_graph import DependencyGraph
@@ -14,12 +20,17 @@ from agents.team_agent import TeamAgent
 from agents.timeline_agent import TimelineAgent
 from agents.value_proposition_agent import ValuePropositionAgent
 from agents.quality_judge_agent import QualityJudgeAgent
+from agents.base_agent import close_http_session
+import aiofiles
 import asyncio
 import logging
+import os
+import shutil
+import tempfile
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -34,7 +45,7 @@ app.add_middleware(
 context_manager = ContextManager()
 dependency_graph = DependencyGraph()
 quality_control = ProposalQualityControl(context_manager)
-proposal_assembler = ProposalAssembler(context_manager)
+proposal_assembler = ProposalAssembler(context_manager, quality_control)
 trigger_controller = TriggerController(context_manager, dependency_graph, quality_control, proposal_assembler)
 
 # Initialize Agents
@@ -49,13 +60,15 @@ agents = {
     # "quality_judge_agent": QualityJudgeAgent("quality_judge_agent", context_manager),
 }
 
+context_manager.register_agents(agents)
+
 # Define Agent Dependencies
 agent_dependencies = {
     "executive_summary_agent": ["value_proposition_agent"],
     "approach_agent": ["scope_agent"],
     "pricing_agent": ["scope_agent"],
     "team_agent": ["scope_agent"],
-    "timeline_agent": ["approach_agent"],
+    "timeline_agent": ["scope_agent"],
 }
 
 # Configure logging
@@ -64,10 +77,23 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
+# Rendered PDFs are written here and served by /proposal/file/{name} instead of being inlined in JSON.
+# Each submission overwrites the previous one's files, and the directory is removed on shutdown.
+PDF_OUTPUT_DIR = tempfile.mkdtemp(prefix="proposal_pdfs_")
+pdf_files: Dict[str, str] = {}
+
 # Register Agents with TriggerController
 for agent_id, agent in agents.items():
     dependencies = agent_dependencies.get(agent_id, [])
-    trigger_controller.register_agent(agent_id, dependencies, agent.process)
+    trigger_controller.register_agent(agent_id, dependencies, agent.process, request_builder=agent.build_request)
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Release the pooled OpenAI HTTP connections shared by the agents
+    await close_http_session()
+    # Remove the rendered PDFs of the last submission
+    pdf_files.clear()
+    shutil.rmtree(PDF_OUTPUT_DIR, ignore_errors=True)
 
 # Define Pydantic Models for Request and Response
 
@@ -122,16 +148,31 @@ class ProposalGenerateResponse(BaseModel):
     pricing: str
     appendices: str
 
+def _log_run_result(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"Proposal generation run failed: {task.exception()}")
+
 # Define API Endpoints
 
 @app.post("/context", response_model=dict)
 async def create_context(request: ProposalGenerateRequest):
     try:
-        # Update the master context with received data
-        context_manager.update_master_context(request.config.dict())
+        # A run still generating the previous proposal would mix its outputs into this one
+        await trigger_controller.cancel_run()
+
+        # Agents are reused across requests; start each proposal with a fresh reasoning log
+        for agent in agents.values():
+            agent.reset()
+        quality_control.quality_judge_agent.reset()
+
+        # Drop the previous proposal's step contexts, then update the master context with received data
+        context_manager.clear_step_contexts()
+        context_manager.update_master_context(request.config)
         
-        # Start the proposal generation process asynchronously
-        asyncio.create_task(trigger_controller.run_all())
+        # Start the proposal generation process asynchronously, keeping a strong reference
+        # so the task is not garbage-collected and its failure is logged rather than lost
+        app.state.run_task = trigger_controller.start_run()
+        app.state.run_task.add_done_callback(_log_run_result)
         
         return {"message": "Context created successfully."}
     except Exception as e:
@@ -141,35 +182,49 @@ async def create_context(request: ProposalGenerateRequest):
 @app.get("/status", response_model=List[dict])
 async def get_status():
     try:
-        statuses = []
-        for agent_id, status in trigger_controller.agent_status.items():
-            statuses.append({
-                "agent_id": agent_id,
-                "state": status.state,
-                "timestamp": status.timestamp.isoformat(),
-            })
-        return statuses
+        # Serialized on each state transition, so polling costs a single read
+        return trigger_controller.status_snapshot
     except Exception as e:
         logging.error(f"Error in /status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/status/run", response_model=dict)
+async def get_run_status():
+    try:
+        return trigger_controller.run_state()
+    except Exception as e:
+        logging.error(f"Error in /status/run: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/sections/{agent_id}", response_model=dict)
 async def get_section(agent_id: str):
     try:
         section = context_manager.get_step_context(agent_id)
-        if "output" in section:
-            return {"output": section["output"]}
+        if section.output is not None:
+            return {"output": section.output}
         else:
             raise HTTPException(status_code=404, detail="Section not found or not yet generated.")
     except Exception as e:
         logging.error(f"Error in /sections/{agent_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/sections/{section_id}/pdf")
+async def get_section_pdf(section_id: str):
+    try:
+        # Section PDFs are rendered lazily; the submitted main document already contains every section
+        pdf = await proposal_assembler.assemble_section_pdf(section_id)
+    except Exception as e:
+        logging.error(f"Error in /sections/{section_id}/pdf: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if pdf is None:
+        raise HTTPException(status_code=404, detail="Section not found or not yet generated.")
+    return Response(content=pdf, media_type="application/pdf")
+
 @app.get("/proposal/preview", response_model=dict)
 async def get_proposal_preview():
     try:
-        outputs = await proposal_assembler.assemble_proposal()
-        # Return HTML content for preview
+        # Preview only needs the HTML, so skip PDF rendering entirely
+        outputs = await proposal_assembler.assemble_html()
         main_html = outputs.get("main_document_html", "")
         return {"html_content": main_html}
     except Exception as e:
@@ -180,16 +235,38 @@ async def get_proposal_preview():
 @app.post("/proposal/submit", response_model=dict)
 async def submit_proposal():
     try:
-        outputs = await proposal_assembler.assemble_proposal()
+        outputs = await proposal_assembler.assemble_pdfs()
         # Implement submission logic, e.g., save to database, send emails, etc.
         # For demonstration, we'll just acknowledge the submission.
-        # If outputs contain PDFs, you might want to handle them appropriately.
-        # Here, we'll assume outputs are already stored or handled.
-        return {"message": "Proposal submitted successfully.", "outputs": {k: v.decode('utf-8') if isinstance(v, bytes) else v for k, v in outputs.items()}}
+        # PDFs are written to disk and returned as URLs; only their metadata goes through JSON.
+        files = {}
+        for key, value in outputs.items():
+            if not key.endswith('_pdf'):
+                continue
+            name = key[:-len('_pdf')]
+            path = os.path.join(PDF_OUTPUT_DIR, f"{name}.pdf")
+            async with aiofiles.open(path, "wb") as f:
+                await f.write(value)
+            pdf_files[name] = path
+            files[name] = {"url": f"/proposal/file/{name}", "size": len(value)}
+        # Expire files from the previous submission that this one did not overwrite
+        for name in [name for name in pdf_files if name not in files]:
+            stale_path = pdf_files.pop(name)
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+        return {"message": "Proposal submitted successfully.", "outputs": files}
     except Exception as e:
         logging.error(f"Error in /proposal/submit: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/proposal/file/{name}")
+async def get_proposal_file(name: str):
+    # Only files written by /proposal/submit are served, so the name can never escape the output dir
+    path = pdf_files.get(name)
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="File not found or not yet generated.")
+    return FileResponse(path, media_type="application/pdf", filename=f"{name}.pdf")
+
 @app.get("/", response_model=str)
 async def root():
     return "Proposal Generation Backend is running."
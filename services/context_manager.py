@@ -1,22 +1,101 @@
 # services/context_manager.py
 
-from typing import Dict, Any
-from collections import defaultdict
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
+from collections import deque
 from datetime import datetime
 import logging
+from pydantic import BaseModel
+from .context_schemas import StepContext, STEP_CONTEXT_TYPES
+
+# Marks a key or context that did not exist before a journaled change
+_MISSING = object()
 
 class ContextManager:
     """Manages both master and step-specific context for agents."""
-    
+
+    # Step context key and the upstream agent whose output fills it
+    _DEPENDENCY_OUTPUTS = {
+        'approach_agent': ('scope_output', 'scope_agent'),
+        'pricing_agent': ('scope_output', 'scope_agent'),
+        'team_agent': ('scope_output', 'scope_agent'),
+        'timeline_agent': ('scope_output', 'scope_agent'),
+        'composite_agent': ('scope_output', 'scope_agent'),
+        'executive_summary_agent': ('value_proposition_output', 'value_proposition_agent'),
+    }
+
     def __init__(self):
         self.master_context: Dict[str, Any] = {}  # Stores shared context data
-        self.step_contexts: Dict[str, Dict[str, Any]] = {}  # Individual agent-specific contexts
-        self.context_versions: Dict[str, int] = defaultdict(int)
-        self.context_history = []  # For tracking updates over time
+        self.step_contexts: Dict[str, StepContext] = {}  # Individual agent-specific contexts
+        # Preallocated for the known agents by register_agents
+        self.context_versions: Dict[str, int] = {'master_context': 0}
+        # Bounded log of update metadata; payloads are not retained so long-running workers stay flat
+        self.context_history: deque = deque(maxlen=1024)
+        # Undo journal of (version, context_name, key, previous value), kept only while a checkpoint is held;
+        # context_name 'context_versions' journals a per-agent version counter
+        self.version = 0
+        self._journal: List[Tuple[int, str, Optional[str], Any]] = []
+        self._journaling = False
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    def register_agents(self, agent_ids: Iterable[str]):
+        """Preallocate version counters for the agents known at startup.
+
+        Step contexts are still created on first use, since their presence marks an initialized agent.
+        """
+        # Built in one pass so the table is sized once; existing counters are kept
+        self.context_versions = {**{agent_id: 0 for agent_id in agent_ids}, **self.context_versions}
+
+    def checkpoint(self) -> int:
+        """Start journaling changes and return a version that `rollback_to` can restore."""
+        self._journaling = True
+        return self.version
+
+    def rollback_to(self, version: int):
+        """Undo every journaled change made after the given checkpoint version, including version counters."""
+        while self._journal and self._journal[-1][0] > version:
+            _, context_name, key, previous = self._journal.pop()
+            self._undo(context_name, key, previous)
+        self.version = version
+        self.logger.info(f"Context rolled back to version {version}")
+
+    def release_checkpoints(self):
+        """Stop journaling and drop the undo journal."""
+        self._journaling = False
+        self._journal.clear()
+
+    def _record(self, context_name: str, key: Optional[str], previous: Any):
+        """Journal the previous value of a key (or a whole context when key is None)."""
+        if self._journaling:
+            self._journal.append((self.version, context_name, key, previous))
+
+    def _undo(self, context_name: str, key: Optional[str], previous: Any):
+        """Restore a single journaled value."""
+        if context_name == 'context_versions':
+            if previous is _MISSING:
+                self.context_versions.pop(key, None)
+            else:
+                self.context_versions[key] = previous
+        elif context_name == 'master_context':
+            if key is None:
+                self.master_context = previous
+                return
+            if previous is _MISSING:
+                self.master_context.pop(key, None)
+            else:
+                self.master_context[key] = previous
+        elif key is None:
+            if previous is _MISSING:
+                self.step_contexts.pop(context_name, None)
+            else:
+                self.step_contexts[context_name] = previous
+        else:
+            # Step context fields always exist, so a journaled field is restored by assignment
+            setattr(self.step_contexts[context_name], key, previous)
+
     def initialize_master_context(self, initial_data: Dict[str, Any]):
         """Initialize the master context at the beginning of the proposal generation process."""
+        self.version += 1
+        self._record('master_context', None, self.master_context)
         self.master_context = initial_data
         self.logger.info("Master context initialized with data.")
         self._log_context_update('master_context', initial_data)
@@ -25,87 +104,87 @@ class ContextManager:
         """Return the master context."""
         return self.master_context
 
-    def update_master_context(self, new_data: Dict[str, Any]):
-        """Update the master context and log the change."""
+    def update_master_context(self, new_data: Union[BaseModel, Dict[str, Any]]):
+        """Update the master context and log the change.
+
+        A validated Pydantic model is dumped here with `exclude_unset`, so fields the caller never
+        sent (and their default lists) are not materialized; agents fall back to their own defaults.
+        """
+        if isinstance(new_data, BaseModel):
+            new_data = new_data.model_dump(exclude_unset=True)
+        self.version += 1
+        for key in new_data:
+            self._record('master_context', key, self.master_context.get(key, _MISSING))
         self.master_context.update(new_data)
         self.logger.info("Master context updated.")
         self._log_context_update('master_context', new_data)
 
+    def build_step_context(self, agent_id: str) -> StepContext:
+        """Build (without storing) an agent's step context from the master context and upstream outputs."""
+        builder = STEP_CONTEXT_TYPES.get(agent_id, StepContext)
+        # Master context sections are shared by reference; agents only read them
+        context = builder.from_master(self.master_context)
+        dependency = self._DEPENDENCY_OUTPUTS.get(agent_id)
+        if dependency:
+            key, source = dependency
+            setattr(context, key, self.step_contexts[source].output if source in self.step_contexts else '')
+        return context
+
     def initialize_step_context(self, agent_id: str):
         """Initialize context for a specific agent using relevant data from master context."""
-        if agent_id not in self.step_contexts:
-            # Base contexts for specific agents
-            if agent_id == 'scope_agent':
-                self.step_contexts[agent_id] = {
-                    'client_info': self.master_context.get('client_info', {}),
-                    'engagement_details': self.master_context.get('engagement_details', {}),
-                    'specific_requirements': self.master_context.get('specific_requirements', {}),
-                }
-            elif agent_id == 'value_proposition_agent':
-                self.step_contexts[agent_id] = {
-                    'client_info': self.master_context.get('client_info', {}),
-                    'engagement_details': self.master_context.get('engagement_details', {}),
-                    'proposal_needs': self.master_context.get('proposal_needs', {}),
-                }
-            elif agent_id == 'quality_judge_agent':
-                self.step_contexts[agent_id] = {
-                    'section_content': None,
-                    'section_id': None,
-                }
-            # Add specific contexts for dependent agents
-            elif agent_id in ['approach_agent', 'pricing_agent', 'team_agent']:
-                # These depend on scope_agent
-                self.step_contexts[agent_id] = {
-                    'client_info': self.master_context.get('client_info', {}),
-                    'engagement_details': self.master_context.get('engagement_details', {}),
-                    'scope_output': self.step_contexts.get('scope_agent', {}).get('output', '')
-                }
-            elif agent_id == 'timeline_agent':
-                # Depends on approach_agent
-                self.step_contexts[agent_id] = {
-                    'client_info': self.master_context.get('client_info', {}),
-                    'engagement_details': self.master_context.get('engagement_details', {}),
-                    'approach_output': self.step_contexts.get('approach_agent', {}).get('output', '')
-                }
-            elif agent_id == 'executive_summary_agent':
-                # Depends on value_proposition_agent
-                self.step_contexts[agent_id] = {
-                    'client_info': self.master_context.get('client_info', {}),
-                    'engagement_details': self.master_context.get('engagement_details', {}),
-                    'value_proposition_output': self.step_contexts.get('value_proposition_agent', {}).get('output', '')
-                }
-            else:
-                self.step_contexts[agent_id] = {}
+        if agent_id in self.step_contexts:
+            return
+        self.version += 1
+        self._record(agent_id, None, _MISSING)
+        self.step_contexts[agent_id] = self.build_step_context(agent_id)
+
+        # Lazy formatting: the context is only stringified when DEBUG is enabled
+        self.logger.debug("Initialized step context for %s: %s", agent_id, self.step_contexts[agent_id])
+
+    def reset_step_context(self, agent_id: str):
+        """Discard an agent's step context so it is rebuilt on the agent's next run."""
+        if agent_id in self.step_contexts:
+            self.version += 1
+            self._record(agent_id, None, self.step_contexts.pop(agent_id))
 
-            # Log the initialized context
-            self.logger.info(f"Initialized step context for {agent_id}: {self.step_contexts[agent_id]}")
+    def clear_step_contexts(self):
+        """Discard every step context so the next run rebuilds them from the current master context."""
+        for agent_id in list(self.step_contexts):
+            self.reset_step_context(agent_id)
 
-    def get_step_context(self, agent_id: str) -> Dict[str, Any]:
+    def get_step_context(self, agent_id: str) -> StepContext:
         """Return the context for a specific agent."""
-        return self.step_contexts.get(agent_id, {})
+        context = self.step_contexts.get(agent_id)
+        return context if context is not None else StepContext()
 
     def update_step_context(self, agent_id: str, new_data: Dict[str, Any]):
         """Update and log changes in a specific agent's context."""
+        self.version += 1
         if agent_id not in self.step_contexts:
-            self.step_contexts[agent_id] = {}
-        self.step_contexts[agent_id].update(new_data)
-        self.context_versions[agent_id] += 1
-        self.logger.info(f"Step context updated for {agent_id}: {self.step_contexts[agent_id]}")
+            self._record(agent_id, None, _MISSING)
+            self.step_contexts[agent_id] = self.build_step_context(agent_id)
+        context = self.step_contexts[agent_id]
+        for key, value in new_data.items():
+            self._record(agent_id, key, getattr(context, key))
+            setattr(context, key, value)
+        self._record('context_versions', agent_id, self.context_versions.get(agent_id, _MISSING))
+        self.context_versions[agent_id] = self.context_versions.get(agent_id, 0) + 1
+        self.logger.debug("Step context updated for %s: %s", agent_id, self.step_contexts[agent_id])
         self._log_context_update(agent_id, new_data)
 
     def _log_context_update(self, context_name: str, update: Dict[str, Any]):
         """Log each update to the context for tracking."""
         self.context_history.append({
-            'timestamp': datetime.now(),
-            'context_name': context_name,
-            'update': update,
-            'version': self.context_versions[context_name]
+            'ts': datetime.now().timestamp(),
+            'name': context_name,
+            'v': self.context_versions.get(context_name, 0),
+            'size': len(str(update))
         })
         self.logger.info(f"Context update logged for {context_name}")
 
     def get_context_history(self) -> list:
-        """Retrieve the entire history of context updates for auditing."""
-        return self.context_history
+        """Retrieve the most recent context update records for auditing."""
+        return list(self.context_history)
     
     def get_context_version(self, agent_id: str) -> int:
         """Retrieve the current version of the context for a specific agent."""
@@ -0,0 +1,65 @@
+# services/context_schemas.py
+
+"""Typed, slotted step contexts for each agent, built from the master context by the ContextManager."""
+
+from dataclasses import dataclass, field, fields
+from typing import Dict, Any
+
+# Master context sections a step context may copy by reference
+MASTER_SECTIONS = ('client_info', 'engagement_details', 'specific_requirements', 'proposal_needs')
+
+@dataclass(slots=True, kw_only=True)
+class StepContext:
+    """Base step context; `output` is filled in once the agent has run."""
+    output: Any = None
+
+    @classmethod
+    def from_master(cls, master_context: Dict[str, Any]) -> "StepContext":
+        """Build a context referencing the master context sections this context declares."""
+        return cls(**{
+            f.name: master_context.get(f.name, {})
+            for f in fields(cls) if f.name in MASTER_SECTIONS
+        })
+
+@dataclass(slots=True, kw_only=True)
+class ScopeContext(StepContext):
+    client_info: Dict[str, Any] = field(default_factory=dict)
+    engagement_details: Dict[str, Any] = field(default_factory=dict)
+    specific_requirements: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass(slots=True, kw_only=True)
+class ValuePropositionContext(StepContext):
+    client_info: Dict[str, Any] = field(default_factory=dict)
+    engagement_details: Dict[str, Any] = field(default_factory=dict)
+    proposal_needs: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass(slots=True, kw_only=True)
+class ScopeDependentContext(StepContext):
+    """Context for the agents that build on the scope agent's output."""
+    client_info: Dict[str, Any] = field(default_factory=dict)
+    engagement_details: Dict[str, Any] = field(default_factory=dict)
+    scope_output: Any = ''
+
+@dataclass(slots=True, kw_only=True)
+class ExecutiveSummaryContext(StepContext):
+    client_info: Dict[str, Any] = field(default_factory=dict)
+    engagement_details: Dict[str, Any] = field(default_factory=dict)
+    value_proposition_output: Any = ''
+
+@dataclass(slots=True, kw_only=True)
+class QualityJudgeContext(StepContext):
+    section_id: Any = None
+    section_content: Any = None
+
+# Step context class for each agent
+STEP_CONTEXT_TYPES: Dict[str, type] = {
+    'scope_agent': ScopeContext,
+    'value_proposition_agent': ValuePropositionContext,
+    'approach_agent': ScopeDependentContext,
+    'pricing_agent': ScopeDependentContext,
+    'team_agent': ScopeDependentContext,
+    'timeline_agent': ScopeDependentContext,
+    'composite_agent': ScopeDependentContext,
+    'executive_summary_agent': ExecutiveSummaryContext,
+    'quality_judge_agent': QualityJudgeContext,
+}
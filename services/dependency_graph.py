@@ -1,4 +1,5 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Optional
+from graphlib import TopologicalSorter, CycleError
 
 class DependencyGraph:
     
@@ -9,36 +10,33 @@ class DependencyGraph:
         """Add a dependency relationship."""
         if agent not in self.dependencies:
             self.dependencies[agent] = []
+        if depends_on in self.dependencies[agent]:
+            return  # Re-registering an agent must not duplicate its dependencies
         self.dependencies[agent].append(depends_on)
 
+    def clear(self):
+        """Remove every dependency relationship."""
+        self.dependencies.clear()
+
     def check_dependencies_met(self, agent: str, agent_status: Dict[str, Any]) -> bool:
         """Check if all dependencies for an agent are completed."""
         deps = self.dependencies.get(agent, [])
         return all(agent_status.get(dep) and agent_status[dep].state == "completed" for dep in deps)
 
+    def get_sorter(self, agents: Optional[Iterable[str]] = None) -> TopologicalSorter:
+        """Return a prepared topological sorter over the given agents (all agents by default).
+
+        Raises `graphlib.CycleError` if the graph contains a cycle.
+        """
+        agents = self.dependencies if agents is None else agents
+        sorter = TopologicalSorter({agent: set(self.dependencies.get(agent, [])) for agent in agents})
+        sorter.prepare()
+        return sorter
+
     def has_circular_dependency(self) -> bool:
-        """Detect circular dependencies using a depth-first search."""
-        visited = {}
-        
-        def visit(agent):
-            if visited.get(agent) == -1:  # Cycle found
-                return True
-            if visited.get(agent) == 1:
-                return False  # Already processed
-            
-            visited[agent] = -1  # Mark as visiting
-            for dep in self.dependencies.get(agent, []):
-                if visit(dep):
-                    return True
-            visited[agent] = 1  # Mark as processed
+        """Detect circular dependencies without recursing over the graph."""
+        try:
+            self.get_sorter()
             return False
-        
-        return any(visit(agent) for agent in self.dependencies)
-
-    def get_dependents(self, agent: str) -> List[str]:
-        """Return a list of agents that depend on the given agent."""
-        dependents = []
-        for ag, deps in self.dependencies.items():
-            if agent in deps:
-                dependents.append(ag)
-        return dependents
\ No newline at end of file
+        except CycleError:
+            return True
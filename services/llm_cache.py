@@ -0,0 +1,192 @@
+# services/llm_cache.py
+
+"""Two-layer cache for LLM responses: an exact-match layer keyed on the full request parameters and persisted
+as JSON files, backed by an opt-in, bounded in-memory semantic layer that matches prompts by embedding similarity."""
+
+from typing import Dict, Any, Deque, List, Optional, Tuple
+from collections import OrderedDict, deque
+import aiofiles
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', '.cache', 'llm')
+AGENT_OUTPUT_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', '.cache', 'agents')
+DEFAULT_TTL = 86400
+# Bound for the in-memory copy of the exact-match layer; evicted entries are still read back from disk
+DEFAULT_MAX_MEMORY_ENTRIES = 1024
+DEFAULT_SEMANTIC_THRESHOLD = 0.92
+# Bounds for the semantic layer: cached embeddings, namespaces, and entries scanned per lookup
+DEFAULT_MAX_EMBEDDINGS = 1024
+DEFAULT_MAX_SEMANTIC_NAMESPACES = 256
+DEFAULT_MAX_SEMANTIC_ENTRIES = 64
+
+class LLMCache:
+    """Caches LLM responses in memory and on disk under `.cache/llm/`, with a semantic fallback layer."""
+
+    def __init__(self,
+                 cache_dir: str = DEFAULT_CACHE_DIR,
+                 cache_sampled: bool = False,
+                 semantic_threshold: float = DEFAULT_SEMANTIC_THRESHOLD,
+                 semantic_enabled: bool = False,
+                 max_memory_entries: int = DEFAULT_MAX_MEMORY_ENTRIES,
+                 max_embeddings: int = DEFAULT_MAX_EMBEDDINGS,
+                 max_semantic_namespaces: int = DEFAULT_MAX_SEMANTIC_NAMESPACES,
+                 max_semantic_entries: int = DEFAULT_MAX_SEMANTIC_ENTRIES):
+        self.cache_dir = cache_dir
+        # Responses sampled with temperature > 0 are only cached when explicitly allowed
+        self.cache_sampled = cache_sampled
+        self.semantic_threshold = semantic_threshold
+        # Semantic hits reuse a response to a different prompt, so the layer must be enabled explicitly
+        self.semantic_enabled = semantic_enabled
+        self.max_memory_entries = max_memory_entries
+        self.max_embeddings = max_embeddings
+        self.max_semantic_namespaces = max_semantic_namespaces
+        self.max_semantic_entries = max_semantic_entries
+        # Exact-match entries, least recently used first
+        self.memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Normalized embeddings keyed by the sha256 of the embedded text, least recently used first
+        self.embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        # Per-namespace (agent and client scope) recent (normalized prompt embedding, response) pairs,
+        # least recently used namespace first
+        self.semantic_entries: "OrderedDict[str, Deque[Tuple[List[float], str]]]" = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'semantic_hits': 0, 'semantic_misses': 0}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @staticmethod
+    def make_key(model: str,
+                 system_message: str,
+                 prompt: str,
+                 temperature: float,
+                 max_tokens: int,
+                 response_format: Optional[Dict[str, Any]] = None) -> str:
+        """Build a stable cache key from the request parameters."""
+        payload = {"m": model, "s": system_message, "p": prompt, "t": temperature, "mt": max_tokens}
+        if response_format is not None:
+            payload["rf"] = response_format
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def is_cacheable(self, temperature: float) -> bool:
+        """Only deterministic requests are cached unless sampled caching is enabled."""
+        return temperature == 0 or self.cache_sampled
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss or expired entry."""
+        entry = self.memory.get(key)
+        if entry is None:
+            path = self._path(key)
+            if os.path.exists(path):
+                try:
+                    async with aiofiles.open(path, "r") as f:
+                        entry = json.loads(await f.read())
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"Failed to read LLM cache entry {key}: {e}")
+
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+
+        if entry['expires_at'] < time.time():
+            self._evict(key)
+            self.stats['misses'] += 1
+            return None
+
+        self._remember(key, entry)
+        self.stats['hits'] += 1
+        return entry['response']
+
+    async def set(self, key: str, response: str, ttl: int = DEFAULT_TTL):
+        """Store a response in memory and persist it to disk."""
+        entry = {'response': response, 'expires_at': time.time() + ttl}
+        self._remember(key, entry)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            async with aiofiles.open(self._path(key), "w") as f:
+                await f.write(json.dumps(entry))
+        except OSError as e:
+            self.logger.warning(f"Failed to persist LLM cache entry {key}: {e}")
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        """Keep an entry in memory as the most recently used, dropping the least recently used beyond the bound."""
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict(self, key: str):
+        """Drop an expired entry from memory and disk."""
+        self.memory.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Failed to remove expired LLM cache entry {key}: {e}")
+
+    def get_embedding(self, text: str) -> Optional[List[float]]:
+        """Return the cached normalized embedding for a text, if any."""
+        key = hashlib.sha256(text.encode()).hexdigest()
+        embedding = self.embeddings.get(key)
+        if embedding is not None:
+            self.embeddings.move_to_end(key)
+        return embedding
+
+    def set_embedding(self, text: str, embedding: List[float]) -> List[float]:
+        """Normalize and cache an embedding so similarity reduces to a dot product."""
+        norm = math.sqrt(sum(x * x for x in embedding)) or 1.0
+        normalized = [x / norm for x in embedding]
+        self.embeddings[hashlib.sha256(text.encode()).hexdigest()] = normalized
+        while len(self.embeddings) > self.max_embeddings:
+            self.embeddings.popitem(last=False)
+        return normalized
+
+    def semantic_get(self, namespace: str, embedding: List[float], threshold: Optional[float] = None) -> Optional[str]:
+        """Return the response of the most similar prompt in a namespace if it clears the threshold."""
+        threshold = self.semantic_threshold if threshold is None else threshold
+        best_score, best_response = -1.0, None
+        entries = self.semantic_entries.get(namespace, ())
+        if entries:
+            self.semantic_entries.move_to_end(namespace)
+        # Bounded by max_semantic_entries, so the scan stays short enough to run inline
+        for stored, response in entries:
+            score = sum(a * b for a, b in zip(embedding, stored))
+            if score > best_score:
+                best_score, best_response = score, response
+
+        if best_response is None or best_score < threshold:
+            self.stats['semantic_misses'] += 1
+            return None
+
+        self.stats['semantic_hits'] += 1
+        self.logger.info(f"Semantic cache hit in {namespace} (similarity {best_score:.3f})")
+        return best_response
+
+    def semantic_set(self, namespace: str, embedding: List[float], response: str):
+        """Record a prompt embedding and its response for future similarity lookups."""
+        entries = self.semantic_entries.get(namespace)
+        if entries is None:
+            entries = self.semantic_entries[namespace] = deque(maxlen=self.max_semantic_entries)
+        self.semantic_entries.move_to_end(namespace)
+        entries.append((embedding, response))
+        while len(self.semantic_entries) > self.max_semantic_namespaces:
+            self.semantic_entries.popitem(last=False)
+
+# Shared across all agents in the process
+llm_cache = LLMCache(
+    cache_sampled=os.getenv("LLM_CACHE_SAMPLED", "").lower() in ("1", "true", "yes"),
+    semantic_threshold=float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", DEFAULT_SEMANTIC_THRESHOLD)),
+    semantic_enabled=os.getenv("LLM_SEMANTIC_CACHE", "").lower() in ("1", "true", "yes"),
+)
+
+# Agent outputs keyed by the agent id and the exact LLM request it would send, so reruns on an unchanged
+# master context skip the agent entirely; sampled outputs follow the same LLM_CACHE_SAMPLED opt-in
+agent_output_cache = LLMCache(
+    cache_dir=AGENT_OUTPUT_CACHE_DIR,
+    cache_sampled=os.getenv("LLM_CACHE_SAMPLED", "").lower() in ("1", "true", "yes"),
+)
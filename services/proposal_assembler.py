@@ -2,30 +2,55 @@
 
 """Collects outputs from all agents, validates them, structures the narrative, applies formatting, and generates the final proposal outputs (e.g., PDFs)."""
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .context_manager import ContextManager
-from .quality_control import ProposalQualityControl
 from jinja2 import Environment, FileSystemLoader
-import pdfkit
+from weasyprint import HTML
+import asyncio
 import logging
 import yaml
 import os
 
+logger = logging.getLogger(__name__)
+
+def _load_style_config() -> Dict[str, Any]:
+    """Load and return style configuration from a YAML file."""
+    
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'proposal_styles.yaml')
+    if os.path.exists(config_path):
+        with open(config_path, "r") as f:
+            return yaml.safe_load(f)
+    else:
+        logger.warning("Style configuration file not found; using default styles.")
+        return {}
+
+# Parsed once per process and shared by every assembler
+_STYLE_CONFIG = _load_style_config()
+
 class ProposalAssembler:
     """Assembles the final proposal from agent outputs."""
     
-    def __init__(self, context_manager: ContextManager):
+    def __init__(self, context_manager: ContextManager, quality_control: Any):
         self.context_manager = context_manager
-        self.quality_control = ProposalQualityControl(context_manager)
+        # Shared with the trigger controller so both paths use one validator and its judge agent
+        self.quality_control = quality_control
         
         # Set up Jinja2 environment to load templates from the correct directory
         template_dir = os.path.join(os.path.dirname(__file__), '..', 'templates')
-        self.template_engine = Environment(loader=FileSystemLoader(template_dir))
+        # Templates never change at runtime, so skip Jinja's per-lookup mtime checks
+        self.template_engine = Environment(loader=FileSystemLoader(template_dir), auto_reload=False, cache_size=400)
+        self._templates = {
+            name: self.template_engine.get_template(f"{name}_template.html")
+            for name in ("main", *self.pdf_sections)
+        }
         
-        # Load style configuration from YAML file
-        self.style_config = self._load_style_config()
+        # Style configuration loaded from YAML at import time
+        self.style_config = _STYLE_CONFIG
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    # Sections that can be rendered to their own PDF on demand
+    pdf_sections = ['executive_summary', 'approach', 'timeline', 'team', 'pricing', 'appendices']
+
     agent_to_section_map = {
         "executive_summary_agent": "executive_summary",
         "approach_agent": "approach",
@@ -36,8 +61,36 @@ class ProposalAssembler:
         "value_proposition_agent": "value_proposition",
     }
 
-    async def assemble_proposal(self) -> Dict[str, Any]:
-        """Assemble, validate, and structure the proposal."""
+    async def assemble_html(self) -> Dict[str, Any]:
+        """Assemble and validate the proposal as HTML only, without rendering any PDFs."""
+        formatted_content = await self._prepare_content()
+        return {'main_document_html': self._render_main_html(formatted_content)}
+
+    async def assemble_pdfs(self) -> Dict[str, Any]:
+        """Assemble, validate, and structure the proposal, including the main PDF."""
+        formatted_content = await self._prepare_content()
+
+        # Generate the final outputs
+        outputs = await self._generate_outputs(formatted_content)
+
+        return outputs
+
+    async def assemble_section_pdf(self, section_name: str) -> Optional[bytes]:
+        """Render a single section to PDF on demand, or return None if it has no content."""
+        if section_name not in self.pdf_sections:
+            return None
+        formatted_content = await self._prepare_content()
+        content = next(
+            (section['content'] for section in formatted_content['sections'] if section['section_id'] == section_name),
+            ""
+        )
+        if not content:
+            return None
+        html = self._templates[section_name].render(**{section_name: content})
+        return await asyncio.to_thread(self._render_pdf, html)
+
+    async def _prepare_content(self) -> Dict[str, Any]:
+        """Collect, validate, structure, and format the agent-generated sections."""
         
         # Collect content from all agent-generated sections
         sections = self._collect_section_content()
@@ -49,21 +102,16 @@ class ProposalAssembler:
 
         # Structure and format narrative content
         structured_content = self._structure_narrative(sections)
-        formatted_content = self._apply_formatting(structured_content)
-
-        # Generate the final outputs
-        outputs = self._generate_outputs(formatted_content)
-
-        return outputs
+        return self._apply_formatting(structured_content)
 
     def _collect_section_content(self) -> Dict[str, str]:
         """Collect content from all sections based on context manager data."""
         
         sections = {}
         for agent_id, content in self.context_manager.step_contexts.items():
-            if 'output' in content and agent_id in self.agent_to_section_map:
+            if content.output is not None and agent_id in self.agent_to_section_map:
                 section_name = self.agent_to_section_map[agent_id]
-                sections[section_name] = content['output']
+                sections[section_name] = content.output
         return sections
 
     def _structure_narrative(self, sections: Dict[str, str]) -> Dict[str, Any]:
@@ -89,49 +137,31 @@ class ProposalAssembler:
         # Currently, this function returns the structured content as-is
         return structured_content
 
-    def _generate_outputs(self, formatted_content: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate multiple outputs, including the main proposal document and section-specific PDFs."""
+    def _render_main_html(self, formatted_content: Dict[str, Any]) -> str:
+        """Render the main proposal document as HTML."""
+        return self._templates["main"].render(sections=formatted_content['sections'])
+
+    @staticmethod
+    def _render_pdf(html: str) -> bytes:
+        """Render an HTML document to PDF bytes."""
+        return HTML(string=html).write_pdf()
+
+    async def _generate_outputs(self, formatted_content: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate the main proposal document as HTML and PDF.
+
+        The main document already contains every section, anchored as `#section-<name>`, so it is
+        the only PDF rendered here; section PDFs are rendered on demand by `assemble_section_pdf`.
+        WeasyPrint rendering is CPU-bound and blocking, so it runs on a worker thread.
+        """
         
         outputs = {}
 
         # Generate main proposal document as HTML for preview
-        main_template = self.template_engine.get_template("main_template.html")
-        main_html = main_template.render(sections=formatted_content['sections'])
+        main_html = self._render_main_html(formatted_content)
         outputs['main_document_html'] = main_html  # HTML for preview
 
-        # Generate main proposal PDF
-        main_pdf = pdfkit.from_string(main_html, False)
-        outputs['main_document_pdf'] = main_pdf
-
-        # Generate additional sections PDFs
-        sections = ['executive_summary', 'approach', 'timeline', 'team', 'pricing', 'appendices']
-        
-        for section_name in sections:
-            content = next(
-                (section['content'] for section in formatted_content['sections'] if section['section_id'] == section_name),
-                ""
-            )
-            if content:
-                try:
-                    template = self.template_engine.get_template(f"{section_name}_template.html")
-                    render_params = {section_name: content}
-                    html = template.render(**render_params)
-                    pdf = pdfkit.from_string(html, False)
-                    outputs[f"{section_name}_pdf"] = pdf
-                except Exception as e:
-                    self.logger.error(f"Error generating PDF for {section_name}: {e}")
+        # Convert the main document to PDF off the event loop
+        outputs['main_document_pdf'] = await asyncio.to_thread(self._render_pdf, main_html)
         
         self.logger.info("Proposal assembled successfully.")
         return outputs
-
-
-    def _load_style_config(self) -> Dict[str, Any]:
-        """Load and return style configuration from a YAML file."""
-        
-        config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'proposal_styles.yaml')
-        if os.path.exists(config_path):
-            with open(config_path, "r") as f:
-                return yaml.safe_load(f)
-        else:
-            self.logger.warning("Style configuration file not found; using default styles.")
-            return {}
@@ -3,36 +3,64 @@
 """Validates proposal sections and overall coherence using the QualityJudgeAgent."""
 
 from typing import Dict, Any
+from collections import OrderedDict
 from .context_manager import ContextManager
+from .context_schemas import QualityJudgeContext
 from agents.quality_judge_agent import QualityJudgeAgent
 import asyncio
+import hashlib
 import logging
 
+# Verdicts kept for unchanged sections, least recently used first
+MAX_CACHED_VERDICTS = 1024
+
 class ProposalQualityControl:
     """Validates proposal sections and overall coherence"""
     def __init__(self, context_manager: ContextManager):
         self.context_manager = context_manager
         self.quality_judge_agent = QualityJudgeAgent("quality_judge_agent", context_manager)
+        # Verdicts keyed by a digest of the section id and text, so unchanged sections are judged once
+        self._verdicts: "OrderedDict[bytes, bool]" = OrderedDict()
         self.logger = logging.getLogger(__name__)
 
-    async def validate_section(self, section_id: str, content: str) -> bool:
-        """Validate a specific section using the QualityJudgeAgent"""
-        context = {
-            'section_id': section_id,
-            'section_content': content
-        }
+    async def validate_section(self, section_id: str, content: Any) -> bool:
+        """Validate a specific section using the QualityJudgeAgent
+
+        An agent result dict is judged on its `output` text alone; its reasoning log and
+        timing metadata change on every run and say nothing about the section's quality.
+        """
+        text = content['output'] if isinstance(content, dict) else content
+        key = hashlib.blake2b(f"{section_id}\0{text}".encode()).digest()
+        if key in self._verdicts:
+            self._verdicts.move_to_end(key)
+            return self._verdicts[key]
+
+        context = QualityJudgeContext(section_id=section_id, section_content=text)
         validation_result = await self.quality_judge_agent.process(context)
-        if validation_result:
+        # process() wraps the judge's own result, whose output is the boolean verdict
+        passed = validation_result['output']['output'] is True
+        if passed:
             self.logger.info(f"Section '{section_id}' passed quality validation.")
-            return True
         else:
             self.logger.warning(f"Section '{section_id}' failed quality validation.")
-            return False
+        self._verdicts[key] = passed
+        if len(self._verdicts) > MAX_CACHED_VERDICTS:
+            self._verdicts.popitem(last=False)
+        return passed
 
     async def validate_proposal(self, sections: Dict[str, Any]) -> bool:
-        """Validate all sections of the proposal"""
-        tasks = []
-        for section_id, content in sections.items():
-            tasks.append(self.validate_section(section_id, content))
-        results = await asyncio.gather(*tasks)
-        return all(results)
\ No newline at end of file
+        """Validate all sections of the proposal
+
+        Sections are judged concurrently in a TaskGroup, so if one judge call raises the
+        remaining ones are cancelled instead of spending LLM quota on a failed proposal.
+        The first failure is re-raised on its own so callers see the original error.
+        """
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = {
+                    section_id: tg.create_task(self.validate_section(section_id, content))
+                    for section_id, content in sections.items()
+                }
+        except* Exception as eg:
+            raise eg.exceptions[0]
+        return all(task.result() for task in tasks.values())
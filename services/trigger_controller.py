@@ -1,10 +1,14 @@
 import asyncio
-from typing import List, Dict, Any, Callable
+from graphlib import CycleError
+from typing import List, Dict, Any, Callable, Optional
 from .dependency_graph import DependencyGraph
 from .context_manager import ContextManager
 from .quality_control import ProposalQualityControl
 from .proposal_assembler import ProposalAssembler
+from .llm_cache import LLMCache, agent_output_cache
+from agents.base_agent import is_transient_error
 import logging
+import random
 from datetime import datetime
 
 class AgentStatus:
@@ -20,23 +24,53 @@ class AgentStatus:
 class TriggerController:
     """Controls execution flow based on dependencies and manages agents."""
     
-    def __init__(self, context_manager: ContextManager, dependency_graph: DependencyGraph, quality_control: ProposalQualityControl, assembler: ProposalAssembler):
+    def __init__(self, context_manager: ContextManager, dependency_graph: DependencyGraph, quality_control: ProposalQualityControl, assembler: ProposalAssembler,
+                 max_retries: int = 3, retry_base_delay: float = 1.0, output_cache: Optional[LLMCache] = None):
         self.context_manager = context_manager
         self.dependency_graph = dependency_graph
         self.quality_control = quality_control
         self.assembler = assembler
         self.agent_status: Dict[str, AgentStatus] = {}
+        # Serialized agent statuses, rebuilt on every state transition so /status is a plain read
+        self._status_entries: Dict[str, Dict[str, Any]] = {}
+        self._status_snapshot: List[Dict[str, Any]] = []
         self.agent_callbacks: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        # The task currently (or most recently) running run_all, so its outcome can be reported
+        self._run_task: Optional[asyncio.Task] = None
+        # Per-agent builders of the LLM request an agent will send; outputs are memoized on that request
+        self.request_builders: Dict[str, Callable[[Any], Optional[Dict[str, Any]]]] = {}
+        self.output_cache = output_cache or agent_output_cache
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
         self.logger = logging.getLogger(__name__)
 
-    def register_agent(self, agent_id: str, dependencies: List[str], callback: Callable[[Dict[str, Any]], Any]):
-        """Register an agent with its dependencies and callback."""
+    def register_agent(self, agent_id: str, dependencies: List[str], callback: Callable[[Dict[str, Any]], Any],
+                       request_builder: Optional[Callable[[Any], Optional[Dict[str, Any]]]] = None):
+        """Register an agent with its dependencies and callback.
+
+        With a `request_builder` (the agent's `build_request`), the agent's output is memoized on the
+        exact LLM request it would send. Agents with side effects beyond their own output must not pass one.
+        """
         for dep in dependencies:
             self.dependency_graph.add_dependency(agent_id, dep)
         self.agent_status[agent_id] = AgentStatus(state="pending", timestamp=datetime.now(), version=1)
+        self._set_state(agent_id, "pending")
         self.agent_callbacks[agent_id] = callback
+        if request_builder is not None:
+            self.request_builders[agent_id] = request_builder
+        else:
+            self.request_builders.pop(agent_id, None)
         self.logger.info(f"Registered agent {agent_id} with dependencies {dependencies}")
 
+    def clear_agents(self):
+        """Unregister every agent along with its dependencies and status."""
+        self.agent_callbacks.clear()
+        self.request_builders.clear()
+        self.agent_status.clear()
+        self._status_entries.clear()
+        self._status_snapshot = []
+        self.dependency_graph.clear()
+
     async def execute_agent(self, agent_id: str):
         """Execute an agent if dependencies are met."""
         if not self.dependency_graph.check_dependencies_met(agent_id, self.agent_status):
@@ -46,43 +80,151 @@ class TriggerController:
         # Initialize agent-specific context
         self.context_manager.initialize_step_context(agent_id)
 
-        # Log the context for debugging
         input_context = self.context_manager.get_step_context(agent_id)
-        self.logger.info(f"Executing agent {agent_id} with context: {input_context}")
+        self.logger.info(f"Executing agent {agent_id}")
+        self.logger.debug("Agent %s context: %s", agent_id, input_context)
 
-        # Proceed with execution as before
         try:
-            output = await self.agent_callbacks[agent_id](input_context)
+            key = self._output_cache_key(agent_id, input_context)
+            cached = await self.output_cache.get(key) if key else None
+            if cached is not None:
+                self.logger.info(f"Agent {agent_id} output served from cache.")
+                output = {'output': cached}
+            else:
+                output = await self._run_with_retries(agent_id, input_context)
+                if key:
+                    await self.output_cache.set(key, output['output'])
             self.context_manager.update_step_context(agent_id, {"output": output['output']})
-            self.agent_status[agent_id].state = "completed"
             self.agent_status[agent_id].output = output['output']
+            self._set_state(agent_id, "completed")
             self.logger.info(f"Agent {agent_id} completed successfully.")
-            await self._trigger_dependents(agent_id)
         except Exception as e:
-            self.agent_status[agent_id].state = "failed"
             self.agent_status[agent_id].error = str(e)
+            self._set_state(agent_id, "failed")
             self.logger.error(f"Agent {agent_id} failed with error: {e}")
 
-    async def _trigger_dependents(self, agent_id: str):
-        """Trigger agents that depend on the completed agent."""
-        dependents = self.dependency_graph.get_dependents(agent_id)
-        for dependent in dependents:
-            if self.dependency_graph.check_dependencies_met(dependent, self.agent_status):
-                self.logger.info(f"Triggering dependent agent: {dependent}")
-                asyncio.create_task(self.execute_agent(dependent))
+    def _output_cache_key(self, agent_id: str, input_context: Any) -> Optional[str]:
+        """Key an agent's output by the LLM request it would send, or None if it is not memoized.
+
+        Like the LLM cache, outputs sampled with temperature > 0 are only memoized when the cache allows it.
+        """
+        request_builder = self.request_builders.get(agent_id)
+        request = request_builder(input_context) if request_builder else None
+        if request is None or not self.output_cache.is_cacheable(request['temperature']):
+            return None
+        return f"{agent_id}-{self.output_cache.make_key(**request)}"
+
+    def _schedule(self, agent_id: str) -> bool:
+        """Move a pending agent to "scheduled", returning False if it was already scheduled in this run."""
+        status = self.agent_status[agent_id]
+        if status.state != "pending":
+            return False
+        self._set_state(agent_id, "scheduled")
+        return True
+
+    def reset_agent(self, agent_id: str):
+        """Return an agent to the pending state, clearing its previous output and error."""
+        status = self.agent_status[agent_id]
+        status.output = None
+        status.error = None
+        self._set_state(agent_id, "pending")
+
+    def _set_state(self, agent_id: str, state: str):
+        """Transition an agent's state and refresh the serialized status snapshot."""
+        status = self.agent_status[agent_id]
+        status.state = state
+        status.timestamp = datetime.now()
+        self._status_entries[agent_id] = {
+            "agent_id": agent_id,
+            "state": state,
+            "timestamp": status.timestamp.isoformat(),
+        }
+        self._status_snapshot = list(self._status_entries.values())
+
+    @property
+    def status_snapshot(self) -> List[Dict[str, Any]]:
+        """Return the serialized status of every registered agent."""
+        return self._status_snapshot
+
+    async def _run_with_retries(self, agent_id: str, input_context: Dict[str, Any]) -> Dict[str, Any]:
+        """Run an agent's callback, retrying transient failures with jittered exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.agent_callbacks[agent_id](input_context)
+            except Exception as e:
+                if attempt == self.max_retries or not is_transient_error(e):
+                    raise
+                delay = self.retry_base_delay * 2 ** attempt * random.uniform(0.5, 1.5)
+                self.logger.warning(f"Agent {agent_id} hit a transient error ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
 
     async def run_all(self):
-        """Run all agents in order based on dependencies, checking for circular dependencies first."""
-        if self.dependency_graph.has_circular_dependency():
+        """Run all agents in dependency waves and return once the whole graph has finished.
+
+        Each wave dispatches every agent whose dependencies have completed concurrently,
+        so independent agents never wait on one another.
+        """
+        self._run_task = asyncio.current_task()
+        try:
+            sorter = self.dependency_graph.get_sorter(self.agent_callbacks)
+        except CycleError:
             self.logger.error("Circular dependency detected. Cannot execute agents.")
             return
 
-        tasks = []
-        for agent_id in self.agent_callbacks.keys():
-            if self.dependency_graph.check_dependencies_met(agent_id, self.agent_status):
-                tasks.append(asyncio.create_task(self.execute_agent(agent_id)))
+        # Every run starts from scratch: agents finished by an earlier run are dispatched again
+        # against contexts rebuilt from the current master context
+        for agent_id in self.agent_callbacks:
+            self.reset_agent(agent_id)
+            self.context_manager.reset_step_context(agent_id)
 
-        if tasks:
-            await asyncio.gather(*tasks)
-        else:
-            self.logger.info("No agents ready for execution.")
\ No newline at end of file
+        while sorter.is_active():
+            ready = sorter.get_ready()
+            if not ready:
+                break  # Everything left depends on a failed or unregistered agent
+
+            # Agents already scheduled or finished elsewhere are not dispatched twice
+            scheduled = [agent_id for agent_id in ready if agent_id in self.agent_callbacks and self._schedule(agent_id)]
+            await asyncio.gather(*(self.execute_agent(agent_id) for agent_id in scheduled))
+
+            for agent_id in ready:
+                status = self.agent_status.get(agent_id)
+                if status and status.state == "completed":
+                    sorter.done(agent_id)  # Dependents of a failed agent stay blocked
+
+        pending = [agent_id for agent_id, status in self.agent_status.items() if status.state == "pending"]
+        if pending:
+            self.logger.info(f"Agents left pending after unmet dependencies: {pending}")
+
+    async def cancel_run(self):
+        """Cancel the run in progress, if any, and wait until it has stopped.
+
+        Runs share the controller's agent statuses and step contexts, so a new run must not start
+        while an earlier one can still write to them.
+        """
+        while self._run_task is not None and not self._run_task.done() and self._run_task is not asyncio.current_task():
+            task = self._run_task
+            task.cancel()
+            await asyncio.wait({task})
+
+    def start_run(self) -> asyncio.Task:
+        """Start run_all in a background task after `cancel_run`.
+
+        A run started by a concurrent request while this caller waited is cancelled before it begins.
+        """
+        if self._run_task is not None and not self._run_task.done():
+            self._run_task.cancel()
+        self._run_task = asyncio.create_task(self.run_all())
+        return self._run_task
+
+    def run_state(self) -> Dict[str, Any]:
+        """Report whether the latest run is idle, running, completed, cancelled or failed."""
+        task = self._run_task
+        if task is None:
+            return {"state": "idle"}
+        if not task.done():
+            return {"state": "running"}
+        if task.cancelled():
+            return {"state": "cancelled"}
+        if task.exception() is not None:
+            return {"state": "failed", "error": str(task.exception())}
+        return {"state": "completed"}
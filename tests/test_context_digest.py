@@ -0,0 +1,18 @@
+# tests/test_context_digest.py
+
+"""Tests for the canonical step context digest."""
+
+from agents.base_agent import context_digest
+from services.context_schemas import ScopeContext
+
+def test_equal_step_contexts_digest_equally_whatever_their_key_order():
+    first = ScopeContext(client_info={'company_name': 'Acme', 'industry': 'Retail'})
+    second = ScopeContext(client_info={'industry': 'Retail', 'company_name': 'Acme'})
+
+    assert context_digest(first) == context_digest(second)
+
+def test_different_step_contexts_digest_differently():
+    acme = ScopeContext(client_info={'company_name': 'Acme'})
+    globex = ScopeContext(client_info={'company_name': 'Globex'})
+
+    assert context_digest(acme) != context_digest(globex)
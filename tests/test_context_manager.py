@@ -0,0 +1,35 @@
+# tests/test_context_manager.py
+
+"""Tests for ContextManager checkpoints and rollback."""
+
+from services.context_manager import ContextManager
+
+def test_rollback_restores_contexts_and_versions():
+    context_manager = ContextManager()
+    context_manager.register_agents(['scope_agent', 'approach_agent'])
+    context_manager.update_master_context({'client_info': {'company_name': 'Acme'}})
+    context_manager.update_step_context('scope_agent', {'output': 'scope for Acme'})
+    versions = dict(context_manager.context_versions)
+
+    version = context_manager.checkpoint()
+    context_manager.update_master_context({'client_info': {'company_name': 'Globex'}, 'engagement_details': {}})
+    context_manager.update_step_context('scope_agent', {'output': 'scope for Globex'})
+    context_manager.initialize_step_context('approach_agent')
+    context_manager.update_step_context('approach_agent', {'output': 'approach for Globex'})
+    context_manager.update_step_context('team_agent', {'output': 'team for Globex'})
+    context_manager.rollback_to(version)
+
+    assert context_manager.get_master_context() == {'client_info': {'company_name': 'Acme'}}
+    assert context_manager.get_step_context('scope_agent').output == 'scope for Acme'
+    assert set(context_manager.step_contexts) == {'scope_agent'}
+    assert context_manager.context_versions == versions
+    assert context_manager.version == version
+
+def test_changes_are_not_journaled_after_release():
+    context_manager = ContextManager()
+    version = context_manager.checkpoint()
+    context_manager.release_checkpoints()
+    context_manager.update_master_context({'client_info': {'company_name': 'Acme'}})
+    context_manager.rollback_to(version)
+
+    assert context_manager.get_master_context() == {'client_info': {'company_name': 'Acme'}}
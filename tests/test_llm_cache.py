@@ -0,0 +1,30 @@
+# tests/test_llm_cache.py
+
+"""Tests for the exact-match layer of LLMCache."""
+
+import asyncio
+import os
+from services.llm_cache import LLMCache
+
+def test_memory_layer_is_bounded_and_falls_back_to_disk(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path), max_memory_entries=2)
+
+    async def fill_and_read():
+        for key in ('a', 'b', 'c'):
+            await cache.set(key, f"response {key}")
+        assert list(cache.memory) == ['b', 'c']
+        return await cache.get('a')
+
+    assert asyncio.run(fill_and_read()) == "response a"
+    assert list(cache.memory) == ['c', 'a']
+
+def test_expired_entry_is_evicted(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path))
+
+    async def set_expired_and_read():
+        await cache.set('a', "response a", ttl=-1)
+        return await cache.get('a')
+
+    assert asyncio.run(set_expired_and_read()) is None
+    assert 'a' not in cache.memory
+    assert not os.path.exists(os.path.join(str(tmp_path), 'a.json'))
@@ -0,0 +1,60 @@
+# tests/test_quality_control.py
+
+"""Tests for ProposalQualityControl verdict handling."""
+
+import asyncio
+import pytest
+from agents.quality_judge_agent import QualityJudgeAgent
+from services.context_manager import ContextManager
+from services.quality_control import ProposalQualityControl
+
+def test_failing_verdict_is_reported_and_cached(monkeypatch):
+    calls = []
+
+    async def fake_call_openai(self, prompt, **kwargs):
+        calls.append(prompt)
+        return '{"pass": false}'
+
+    monkeypatch.setattr(QualityJudgeAgent, "_call_openai", fake_call_openai)
+    quality_control = ProposalQualityControl(ContextManager())
+
+    assert asyncio.run(quality_control.validate_section('approach', 'Too short.')) is False
+    assert asyncio.run(quality_control.validate_proposal({'approach': 'Too short.'})) is False
+    assert len(calls) == 1
+
+def test_passing_verdict_is_reported(monkeypatch):
+    async def fake_call_openai(self, prompt, **kwargs):
+        return '{"pass": true}'
+
+    monkeypatch.setattr(QualityJudgeAgent, "_call_openai", fake_call_openai)
+    quality_control = ProposalQualityControl(ContextManager())
+
+    assert asyncio.run(quality_control.validate_proposal({'approach': 'A complete approach.'})) is True
+
+def test_judge_error_is_raised_unwrapped(monkeypatch):
+    async def fake_call_openai(self, prompt, **kwargs):
+        raise RuntimeError("judge unavailable")
+
+    monkeypatch.setattr(QualityJudgeAgent, "_call_openai", fake_call_openai)
+    quality_control = ProposalQualityControl(ContextManager())
+
+    with pytest.raises(RuntimeError, match="judge unavailable"):
+        asyncio.run(quality_control.validate_proposal({'approach': 'An approach.', 'team': 'A team.'}))
+
+def test_verdict_is_keyed_on_the_section_text(monkeypatch):
+    prompts = []
+
+    async def fake_call_openai(self, prompt, **kwargs):
+        prompts.append(prompt)
+        return '{"pass": true}'
+
+    monkeypatch.setattr(QualityJudgeAgent, "_call_openai", fake_call_openai)
+    quality_control = ProposalQualityControl(ContextManager())
+
+    # Two runs of the same agent: identical text, different reasoning logs
+    for timestamp in (1, 2):
+        section = {'output': 'A complete approach.', 'reasoning_log': [{'step': 'Processing Start', 'timestamp': timestamp}]}
+        assert asyncio.run(quality_control.validate_section('approach', section)) is True
+
+    assert len(prompts) == 1
+    assert 'reasoning_log' not in prompts[0]
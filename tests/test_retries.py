@@ -0,0 +1,91 @@
+# tests/test_retries.py
+
+"""Tests for transient error classification and the agent retry loop."""
+
+import asyncio
+import aiohttp
+import pytest
+from contextlib import asynccontextmanager
+from agents import base_agent
+from agents.base_agent import OpenAIHTTPError, is_transient_error
+from agents.scope_agent import ScopeAgent
+from services.context_manager import ContextManager
+from services.dependency_graph import DependencyGraph
+from services.llm_cache import LLMCache
+from services.trigger_controller import TriggerController
+
+def test_is_transient_error():
+    assert is_transient_error(OpenAIHTTPError(429, "rate limited"))
+    assert is_transient_error(OpenAIHTTPError(502, "<html>Bad Gateway</html>"))
+    assert is_transient_error(aiohttp.ClientError())
+    assert is_transient_error(asyncio.TimeoutError())
+    assert not is_transient_error(OpenAIHTTPError(400, "bad request"))
+    assert not is_transient_error(ValueError("Processing result is empty."))
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    async def text(self):
+        return self.body
+
+    async def json(self, content_type=None):
+        raise ValueError("Expecting value")
+
+def test_gateway_error_page_is_raised_as_a_transient_http_error(tmp_path, monkeypatch):
+    @asynccontextmanager
+    async def fake_post_chat_completion(payload):
+        yield FakeResponse(502, "<html>502 Bad Gateway</html>")
+
+    monkeypatch.setattr(base_agent, "post_chat_completion", fake_post_chat_completion)
+    agent = ScopeAgent("scope_agent", ContextManager())
+    agent.llm_cache = LLMCache(cache_dir=str(tmp_path))
+
+    with pytest.raises(OpenAIHTTPError) as excinfo:
+        asyncio.run(agent._call_openai("Describe the scope."))
+
+    assert excinfo.value.status == 502
+    assert is_transient_error(excinfo.value)
+
+def run_flaky_agent(tmp_path, errors, max_retries=3):
+    controller = TriggerController(
+        ContextManager(),
+        DependencyGraph(),
+        quality_control=None,
+        assembler=None,
+        max_retries=max_retries,
+        retry_base_delay=0,
+        output_cache=LLMCache(cache_dir=str(tmp_path))
+    )
+    attempts = []
+
+    async def flaky(context):
+        attempts.append(len(attempts))
+        if len(attempts) <= len(errors):
+            raise errors[len(attempts) - 1]
+        return {'output': "scope"}
+
+    controller.register_agent('scope_agent', [], flaky)
+    asyncio.run(controller.run_all())
+    return controller.agent_status['scope_agent'], len(attempts)
+
+def test_transient_errors_are_retried(tmp_path):
+    status, attempts = run_flaky_agent(tmp_path, [OpenAIHTTPError(503, ""), OpenAIHTTPError(429, "")])
+
+    assert attempts == 3
+    assert status.state == "completed"
+    assert status.output == "scope"
+
+def test_permanent_error_is_not_retried(tmp_path):
+    status, attempts = run_flaky_agent(tmp_path, [OpenAIHTTPError(400, "bad request")])
+
+    assert attempts == 1
+    assert status.state == "failed"
+
+def test_retries_stop_after_max_retries(tmp_path):
+    status, attempts = run_flaky_agent(tmp_path, [OpenAIHTTPError(502, "")] * 5, max_retries=2)
+
+    assert attempts == 3
+    assert status.state == "failed"
+    assert "HTTP 502" in status.error
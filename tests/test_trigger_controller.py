@@ -0,0 +1,154 @@
+# tests/test_trigger_controller.py
+
+"""Tests for TriggerController run scheduling."""
+
+import asyncio
+from agents.approach_agent import ApproachAgent
+from agents.scope_agent import ScopeAgent
+from services.context_manager import ContextManager
+from services.dependency_graph import DependencyGraph
+from services.llm_cache import LLMCache
+from services.trigger_controller import TriggerController
+
+def make_controller(tmp_path, cache_sampled=False):
+    context_manager = ContextManager()
+    controller = TriggerController(
+        context_manager,
+        DependencyGraph(),
+        quality_control=None,
+        assembler=None,
+        output_cache=LLMCache(cache_dir=str(tmp_path), cache_sampled=cache_sampled)
+    )
+    return context_manager, controller
+
+def test_second_run_dispatches_every_agent_again(tmp_path):
+    context_manager, controller = make_controller(tmp_path)
+    calls = []
+
+    async def scope(context):
+        calls.append('scope_agent')
+        return {'output': f"scope for {context.client_info['company_name']}"}
+
+    async def approach(context):
+        calls.append('approach_agent')
+        return {'output': f"approach on {context.scope_output}"}
+
+    controller.register_agent('scope_agent', [], scope)
+    controller.register_agent('approach_agent', ['scope_agent'], approach)
+
+    context_manager.update_master_context({'client_info': {'company_name': 'Acme'}})
+    asyncio.run(controller.run_all())
+    context_manager.update_master_context({'client_info': {'company_name': 'Globex'}})
+    asyncio.run(controller.run_all())
+
+    assert calls == ['scope_agent', 'approach_agent'] * 2
+    assert all(status.state == "completed" for status in controller.agent_status.values())
+    assert controller.agent_status['approach_agent'].output == "approach on scope for Globex"
+
+def test_overlapping_run_is_cancelled_before_the_next_one_starts(tmp_path):
+    context_manager, controller = make_controller(tmp_path)
+    calls = []
+    acme_scope_started = None
+
+    async def scope(context):
+        company_name = context.client_info['company_name']
+        calls.append(('scope_agent', company_name))
+        if company_name == 'Acme':
+            acme_scope_started.set()
+            await asyncio.sleep(3600)  # Still running when the next config arrives
+        return {'output': f"scope {company_name}"}
+
+    async def approach(context):
+        company_name = context.client_info['company_name']
+        calls.append(('approach_agent', company_name))
+        return {'output': f"approach {company_name} / {context.scope_output}"}
+
+    controller.register_agent('scope_agent', [], scope)
+    controller.register_agent('approach_agent', ['scope_agent'], approach)
+
+    async def post_context(company_name):
+        # Same sequence as POST /context
+        await controller.cancel_run()
+        context_manager.clear_step_contexts()
+        context_manager.update_master_context({'client_info': {'company_name': company_name}})
+        return controller.start_run()
+
+    async def overlapping_runs():
+        nonlocal acme_scope_started
+        acme_scope_started = asyncio.Event()
+        first = await post_context('Acme')
+        await acme_scope_started.wait()
+        second = await post_context('Globex')
+        await second
+        return first
+
+    first = asyncio.run(overlapping_runs())
+
+    assert first.cancelled()
+    assert calls == [('scope_agent', 'Acme'), ('scope_agent', 'Globex'), ('approach_agent', 'Globex')]
+    assert controller.agent_status['approach_agent'].output == "approach Globex / scope Globex"
+    assert controller.run_state() == {"state": "completed"}
+
+def make_config(company_name: str, objective: str):
+    return {
+        'client_info': {'company_name': company_name, 'industry': 'Retail', 'size': 'Large'},
+        'engagement_details': {'timeline': '6 months', 'budget_range': '$1M', 'project_objectives': [objective]},
+        'specific_requirements': {},
+    }
+
+def test_different_configs_are_not_served_from_the_output_cache(tmp_path, monkeypatch):
+    context_manager, controller = make_controller(tmp_path, cache_sampled=True)
+    prompts = []
+
+    async def fake_call_openai(self, prompt, **kwargs):
+        prompts.append(prompt)
+        return f"approach for {prompt.splitlines()[0]}"
+
+    monkeypatch.setattr(ApproachAgent, "_call_openai", fake_call_openai)
+    scope_agent = ScopeAgent("scope_agent", context_manager)
+    approach_agent = ApproachAgent("approach_agent", context_manager)
+    controller.register_agent('scope_agent', [], scope_agent.process, request_builder=scope_agent.build_request)
+    controller.register_agent('approach_agent', ['scope_agent'], approach_agent.process,
+                              request_builder=approach_agent.build_request)
+
+    outputs = []
+    for config in (make_config('Acme', 'Grow online sales'), make_config('Globex', 'Cut logistics costs')):
+        # Same sequence as POST /context
+        context_manager.clear_step_contexts()
+        context_manager.update_master_context(config)
+        asyncio.run(controller.run_all())
+        outputs.append(controller.agent_status['approach_agent'].output['output'])
+
+    assert len(prompts) == 2
+    assert outputs[0] != outputs[1]
+    assert "Globex" in outputs[1]
+
+def run_approach_twice(controller, context_manager, monkeypatch):
+    calls = []
+
+    async def fake_call_openai(self, prompt, **kwargs):
+        calls.append(prompt)
+        return "approach"
+
+    monkeypatch.setattr(ApproachAgent, "_call_openai", fake_call_openai)
+    approach_agent = ApproachAgent("approach_agent", context_manager)
+    controller.register_agent('approach_agent', [], approach_agent.process, request_builder=approach_agent.build_request)
+
+    for _ in range(2):
+        context_manager.clear_step_contexts()
+        context_manager.update_master_context(make_config('Acme', 'Grow online sales'))
+        asyncio.run(controller.run_all())
+
+    assert controller.agent_status['approach_agent'].state == "completed"
+    return calls
+
+def test_identical_config_is_served_from_the_output_cache(tmp_path, monkeypatch):
+    context_manager, controller = make_controller(tmp_path, cache_sampled=True)
+
+    assert len(run_approach_twice(controller, context_manager, monkeypatch)) == 1
+
+def test_sampled_output_is_not_memoized_by_default(tmp_path, monkeypatch):
+    context_manager, controller = make_controller(tmp_path)
+
+    # The approach agent samples at temperature 0.7, so each run generates the section again
+    assert len(run_approach_twice(controller, context_manager, monkeypatch)) == 2